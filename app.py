@@ -3,12 +3,25 @@ Streamlit UI for AI Market Analyst Agent (Bonus Feature 4).
 """
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
 from typing import Dict, Any
 
 # Configuration
 API_BASE_URL = "http://localhost:8000/api/v1"
 
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Shared HTTP session so all tabs reuse one keep-alive connection pool."""
+    session = requests.Session()
+    session.headers["Connection"] = "keep-alive"
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 st.set_page_config(
     page_title="AI Market Analyst",
     page_icon="📊",
@@ -16,6 +29,34 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+SESSION = get_session()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_health() -> Dict[str, Any]:
+    """
+    Fetch API health, cached for 30 seconds across reruns.
+    
+    Returns the health payload. Error statuses and connection errors are
+    raised (and therefore not cached), so a recovered API shows up on the
+    next rerun.
+    """
+    health_response = SESSION.get(f"{API_BASE_URL}/health", timeout=2)
+    health_response.raise_for_status()
+    return orjson.loads(health_response.content)
+
+
+def iter_sse(response: requests.Response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event = "message"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            event = "message"
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            yield event, orjson.loads(line[len("data:"):].strip())
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -57,17 +98,15 @@ with st.sidebar:
     
     # Check API health
     try:
-        health_response = requests.get(f"{API_BASE_URL}/health")
-        if health_response.status_code == 200:
-            health_data = health_response.json()
-            st.success("✅ API Status: Healthy")
-            
-            with st.expander("📋 System Info"):
-                st.write(f"**Vector Store:** {health_data['vector_store']['total_documents']} documents")
-                st.write(f"**Embedding Model:** {health_data['embedding_model']}")
-                st.write(f"**Generation Model:** {health_data['generation_model']}")
-        else:
-            st.error("❌ API Status: Unhealthy")
+        health_data = fetch_health()
+        st.success("✅ API Status: Healthy")
+        
+        with st.expander("📋 System Info"):
+            st.write(f"**Vector Store:** {health_data['vector_store']['total_documents']} documents")
+            st.write(f"**Embedding Model:** {health_data['embedding_model']}")
+            st.write(f"**Generation Model:** {health_data['generation_model']}")
+    except requests.HTTPError:
+        st.error("❌ API Status: Unhealthy")
     except Exception as e:
         st.error(f"❌ Cannot connect to API: {str(e)}")
     
@@ -112,13 +151,13 @@ with tab1:
     if auto_button and auto_query:
         with st.spinner("Processing your query..."):
             try:
-                response = requests.post(
+                response = SESSION.post(
                     f"{API_BASE_URL}/auto",
                     json={"query": auto_query}
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     
                     # Show routing decision
                     routing = data['routing']
@@ -181,26 +220,37 @@ with tab2:
     if qa_button and question:
         with st.spinner("Searching for answer..."):
             try:
-                response = requests.post(
-                    f"{API_BASE_URL}/qa",
-                    json={"question": question, "top_k": top_k}
+                response = SESSION.post(
+                    f"{API_BASE_URL}/qa/stream",
+                    json={"question": question, "top_k": top_k},
+                    stream=True
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Show answer
+                    # Show answer as it is generated
                     st.markdown("### 💡 Answer")
-                    st.success(data['answer'])
+                    answer_placeholder = st.empty()
+                    answer_text = ""
+                    data = None
                     
-                    # Show confidence
-                    st.metric("Confidence", f"{data['confidence']:.0%}")
+                    for event, payload in iter_sse(response):
+                        if event == "done":
+                            data = payload
+                        elif event == "error":
+                            st.error(f"Error: {payload['detail']}")
+                        else:
+                            answer_text += payload['text']
+                            answer_placeholder.success(answer_text)
                     
-                    # Show sources
-                    with st.expander("📚 View Sources"):
-                        for i, source in enumerate(data['sources'], 1):
-                            st.markdown(f"**Source {i}:**")
-                            st.text_area(f"source_{i}", source, height=150, disabled=True, label_visibility="collapsed")
+                    if data is not None:
+                        # Show confidence
+                        st.metric("Confidence", f"{data['confidence']:.0%}")
+                        
+                        # Show sources
+                        with st.expander("📚 View Sources"):
+                            for i, source in enumerate(data['sources'], 1):
+                                st.markdown(f"**Source {i}:**")
+                                st.text_area(f"source_{i}", source, height=150, disabled=True, label_visibility="collapsed")
                 else:
                     st.error(f"Error: {response.status_code} - {response.text}")
             
@@ -227,22 +277,34 @@ with tab3:
     if summarize_button:
         with st.spinner("Generating summary..."):
             try:
-                response = requests.post(
-                    f"{API_BASE_URL}/summarize",
-                    json={"summary_type": summary_type, "max_words": max_words}
+                response = SESSION.post(
+                    f"{API_BASE_URL}/summarize/stream",
+                    json={"summary_type": summary_type, "max_words": max_words},
+                    stream=True
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
-                    
+                    # Show summary as it is generated
                     st.markdown("### 📄 Summary")
-                    st.markdown(data['summary'])
+                    summary_placeholder = st.empty()
+                    summary_text = ""
+                    data = None
                     
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("Word Count", data['word_count'])
-                    with col2:
-                        st.metric("Type", data['summary_type'])
+                    for event, payload in iter_sse(response):
+                        if event == "done":
+                            data = payload
+                        elif event == "error":
+                            st.error(f"Error: {payload['detail']}")
+                        else:
+                            summary_text += payload['text']
+                            summary_placeholder.markdown(summary_text)
+                    
+                    if data is not None:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric("Word Count", data['word_count'])
+                        with col2:
+                            st.metric("Type", data['summary_type'])
                 else:
                     st.error(f"Error: {response.status_code} - {response.text}")
             
@@ -259,10 +321,10 @@ with tab4:
     if extract_button:
         with st.spinner("Extracting data..."):
             try:
-                response = requests.post(f"{API_BASE_URL}/extract", json={})
+                response = SESSION.post(f"{API_BASE_URL}/extract", json={})
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     
                     if data['success']:
                         st.markdown("### 📊 Extracted Data")
@@ -271,10 +333,10 @@ with tab4:
                         st.json(data['data'])
                         
                         # Download button
-                        json_str = json.dumps(data['data'], indent=2)
+                        json_bytes = orjson.dumps(data['data'], option=orjson.OPT_INDENT_2)
                         st.download_button(
                             label="💾 Download JSON",
-                            data=json_str,
+                            data=json_bytes,
                             file_name="extracted_data.json",
                             mime="application/json"
                         )
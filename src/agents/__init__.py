@@ -3,5 +3,10 @@ from .qa_agent import QAAgent
 from .summarizer import SummarizerAgent
 from .extractor import ExtractorAgent
 from .router import RouterAgent
+from ._gemini import ensure_configured, get_model
+from ._llm_cache import configure_llm_cache, get_llm_cache
 
-__all__ = ['QAAgent', 'SummarizerAgent', 'ExtractorAgent', 'RouterAgent']
+__all__ = [
+    'QAAgent', 'SummarizerAgent', 'ExtractorAgent', 'RouterAgent',
+    'ensure_configured', 'get_model', 'configure_llm_cache', 'get_llm_cache'
+]
@@ -0,0 +1,36 @@
+"""
+Shared Gemini client configuration and model instances.
+"""
+import google.generativeai as genai
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def ensure_configured(api_key: str) -> None:
+    """
+    Configure the Gemini client for an API key, once per process.
+    
+    genai.configure replaces the process-wide client configuration, so
+    components share one call instead of repeating it in every constructor.
+    
+    Args:
+        api_key: Google Gemini API key
+    """
+    genai.configure(api_key=api_key)
+
+
+@lru_cache(maxsize=4)
+def get_model(model_name: str) -> genai.GenerativeModel:
+    """
+    Return the process-wide GenerativeModel for a model name.
+    
+    All agents using the same model share one instance, so its client and
+    transport are created once instead of once per agent.
+    
+    Args:
+        model_name: Name of the generation model
+        
+    Returns:
+        Shared GenerativeModel instance
+    """
+    return genai.GenerativeModel(model_name)
@@ -0,0 +1,370 @@
+"""
+Response cache for Gemini generation calls.
+"""
+import google.generativeai as genai
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+
+try:
+    import redis
+except ImportError:  # Redis is an optional second tier
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for generated text.
+
+    Design Decision: In-process LRU (L1) + optional Redis (L2)
+
+    Rationale:
+    1. Why cache generations:
+       - The document is fixed, so identical prompts are common
+       - A Gemini round trip costs hundreds of ms to seconds
+       - A dictionary lookup costs microseconds
+
+    2. Cache Key:
+       - SHA-256 of (model_name, temperature, max_tokens, prompt)
+       - Fixed-size keys regardless of prompt length
+       - Any change to sampling parameters is a different entry
+
+    3. Tiers:
+       - L1: OrderedDict LRU, per process, bounded by maxsize
+       - L2: Redis with TTL, shared across workers and restarts
+       - L2 failures are logged and never fail the request
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        maxsize: int = 512,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 4 * 60 * 60
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            enabled: Whether caching is active
+            maxsize: Maximum number of entries kept in memory
+            redis_url: Optional Redis URL for the shared second tier
+            ttl_seconds: Expiry for Redis entries
+        """
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+        if enabled and redis_url:
+            if redis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed")
+            else:
+                self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    @staticmethod
+    def make_key(model_name: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        """Build the cache key for a generation request."""
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        return f"llm:{model_name}:{temperature}:{max_tokens}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, promoting L2 hits into L1."""
+        if not self.enabled:
+            return None
+
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        return self._get_remote(key)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async variant of get; the Redis lookup runs in a worker thread."""
+        if not self.enabled:
+            return None
+
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if self._redis is None:
+            return self._get_remote(key)  # No I/O, only records the miss
+        return await asyncio.to_thread(self._get_remote, key)
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers."""
+        if not self.enabled:
+            return
+
+        self._store_local(key, value)
+        if self._redis is not None:
+            self._store_remote(key, value)
+
+    async def aset(self, key: str, value: str) -> None:
+        """Async variant of set; the Redis write runs in a worker thread."""
+        if not self.enabled:
+            return
+
+        self._store_local(key, value)
+        if self._redis is not None:
+            await asyncio.to_thread(self._store_remote, key, value)
+
+    def _get_local(self, key: str) -> Optional[str]:
+        """Look up the in-memory LRU, counting a hit if found."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        return None
+
+    def _get_remote(self, key: str) -> Optional[str]:
+        """Look up Redis after an L1 miss, promoting hits and counting the outcome."""
+        value = None
+        if self._redis is not None:
+            try:
+                value = self._redis.get(key)
+            except Exception as e:
+                logger.warning(f"Redis cache lookup failed: {e}")
+
+        if value is not None:
+            self._store_local(key, value)
+
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                self.redis_hits += 1
+            else:
+                self.misses += 1
+        return value
+
+    def _store_local(self, key: str, value: str) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _store_remote(self, key: str, value: str) -> None:
+        """Write to Redis with the configured TTL; failures are only logged."""
+        try:
+            self._redis.setex(key, self.ttl_seconds, value)
+        except Exception as e:
+            logger.warning(f"Redis cache store failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.redis_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return HIT/MISS counters for monitoring."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'redis_hits': self.redis_hits,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'redis': self._redis is not None
+            }
+
+
+_cache = LLMResponseCache(
+    enabled=os.getenv("ENABLE_LLM_CACHE", "true").lower() in ("1", "true", "yes")
+)
+
+
+def configure_llm_cache(
+    enabled: bool = True,
+    maxsize: int = 512,
+    redis_url: Optional[str] = None,
+    ttl_seconds: int = 4 * 60 * 60
+) -> LLMResponseCache:
+    """Replace the process-wide cache with one built from the given settings."""
+    global _cache
+    _cache = LLMResponseCache(
+        enabled=enabled,
+        maxsize=maxsize,
+        redis_url=redis_url,
+        ttl_seconds=ttl_seconds
+    )
+    return _cache
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide cache."""
+    return _cache
+
+
+def _make_key(
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> str:
+    """Build the cache key for a generation request."""
+    return _cache.make_key(
+        model_name,
+        generation_config.temperature,
+        generation_config.max_output_tokens,
+        prompt
+    )
+
+
+def _log_lookup(model_name: str, cached: Optional[str]) -> None:
+    """Log the outcome of a cache lookup."""
+    if cached is not None:
+        logger.debug(f"LLM cache HIT ({model_name})")
+    else:
+        logger.debug(f"LLM cache MISS ({model_name})")
+
+
+def _lookup(
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> Tuple[str, Optional[str]]:
+    """Return the cache key for a request and the cached text, if any."""
+    key = _make_key(prompt, model_name, generation_config)
+    cached = _cache.get(key)
+    _log_lookup(model_name, cached)
+    return key, cached
+
+
+async def _alookup(
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> Tuple[str, Optional[str]]:
+    """Async variant of _lookup that keeps Redis I/O off the event loop."""
+    key = _make_key(prompt, model_name, generation_config)
+    cached = await _cache.aget(key)
+    _log_lookup(model_name, cached)
+    return key, cached
+
+
+def generate_cached(
+    model: genai.GenerativeModel,
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> str:
+    """
+    Generate text for a prompt, serving repeats from the cache.
+
+    Args:
+        model: Gemini model used on a cache miss
+        prompt: Full prompt text
+        model_name: Model name (part of the cache key)
+        generation_config: Sampling parameters (temperature and
+            max_output_tokens are part of the cache key)
+
+    Returns:
+        The generated (or cached) response text
+    """
+    key, cached = _lookup(prompt, model_name, generation_config)
+    if cached is not None:
+        return cached
+
+    response = model.generate_content(
+        prompt,
+        generation_config=generation_config
+    )
+
+    text = response.text
+    _cache.set(key, text)
+
+    return text
+
+
+async def agenerate_cached(
+    model: genai.GenerativeModel,
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> str:
+    """
+    Async variant of generate_cached using Gemini's async client.
+
+    Args:
+        model: Gemini model used on a cache miss
+        prompt: Full prompt text
+        model_name: Model name (part of the cache key)
+        generation_config: Sampling parameters (temperature and
+            max_output_tokens are part of the cache key)
+
+    Returns:
+        The generated (or cached) response text
+    """
+    key, cached = await _alookup(prompt, model_name, generation_config)
+    if cached is not None:
+        return cached
+
+    response = await model.generate_content_async(
+        prompt,
+        generation_config=generation_config
+    )
+
+    text = response.text
+    await _cache.aset(key, text)
+
+    return text
+
+
+def stream_cached(
+    model: genai.GenerativeModel,
+    prompt: str,
+    model_name: str,
+    generation_config: genai.types.GenerationConfig
+) -> Iterator[str]:
+    """
+    Stream generated text, serving repeats from the cache in one piece.
+
+    The full text is cached once the stream completes, so a later call with
+    the same prompt (streaming or not) is a cache hit.
+
+    Args:
+        model: Gemini model used on a cache miss
+        prompt: Full prompt text
+        model_name: Model name (part of the cache key)
+        generation_config: Sampling parameters (temperature and
+            max_output_tokens are part of the cache key)
+
+    Yields:
+        Pieces of the response text as they are generated
+    """
+    key, cached = _lookup(prompt, model_name, generation_config)
+    if cached is not None:
+        yield cached
+        return
+
+    response = model.generate_content(
+        prompt,
+        generation_config=generation_config,
+        stream=True
+    )
+
+    parts = []
+    for chunk in response:
+        text = chunk.text
+        parts.append(text)
+        yield text
+
+    _cache.set(key, "".join(parts))
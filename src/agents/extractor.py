@@ -2,10 +2,92 @@
 Structured Data Extraction Agent.
 """
 import google.generativeai as genai
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List
+import asyncio
+import logging
+import orjson
 import re
 
+from ._gemini import ensure_configured, get_model
+from ._llm_cache import generate_cached, agenerate_cached
+
+
+logger = logging.getLogger(__name__)
+
+# Leading ```json / ``` and trailing ``` markdown fences
+_RE_JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+# First number in strings like "12%" or "12.5 percent"
+_RE_NUM = re.compile(r'(\d+\.?\d*)')
+
+# Characters searched at each end of a response before a full scan for braces
+_BRACE_WINDOW = 64
+
+
+def _salvage_json_object(text: str) -> str:
+    """
+    Return the first JSON object in text, closing it if it was truncated.
+    
+    Walks the text once from the first '{', tracking string state, open
+    brackets and the last point where every value so far is complete. If the
+    text ends before the object closes (e.g. the model hit
+    max_output_tokens), the open string and brackets are closed so that the
+    complete fields can still be parsed. When that is not valid JSON (the
+    cut fell inside a key or after a ':'), the text is trimmed back to the
+    last complete value instead.
+    """
+    start = text.find('{')
+    if start == -1:
+        return text
+    
+    closers = []
+    in_string = False
+    escaped = False
+    cut, cut_closers = start, []
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char == '{':
+            closers.append('}')
+            cut, cut_closers = i + 1, closers[:]
+        elif char == '[':
+            closers.append(']')
+            cut, cut_closers = i + 1, closers[:]
+        elif char in '}]':
+            if closers:
+                closers.pop()
+            if not closers:
+                return text[start:i + 1]
+            cut, cut_closers = i + 1, closers[:]
+        elif char == ',':
+            cut, cut_closers = i, closers[:]
+    
+    # Truncated: close the open string, drop a dangling separator, close brackets
+    salvaged = text[start:]
+    if in_string:
+        salvaged += '"'
+    salvaged = salvaged.rstrip().rstrip(',') + ''.join(reversed(closers))
+    try:
+        orjson.loads(salvaged)
+        return salvaged
+    except orjson.JSONDecodeError:
+        pass
+    
+    # Cut inside a key or a value: keep only the fields before it
+    return text[start:cut] + ''.join(reversed(cut_closers))
+
 
 class ExtractorAgent:
     """
@@ -31,7 +113,8 @@ class ExtractorAgent:
        - Convert string numbers to proper types
     
     4. Prompt Structure:
-       - Start with role definition
+       - Start with the document (shared prefix across document prompts)
+       - Follow with role definition
        - Show exact schema
        - Give clear extraction instructions
        - End with format reminder
@@ -45,10 +128,18 @@ class ExtractorAgent:
             api_key: Google Gemini API key
             model_name: Name of the generation model
         """
-        genai.configure(api_key=api_key)
+        ensure_configured(api_key)
         self.model_name = model_name
         self.temperature = 0.1  # Very low for consistent structured output
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_model(model_name)
+        self._gen_cfg = genai.types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=1024,
+        )
+        
+        # (document, prompt) for the last document seen; the report is
+        # fixed, so every default extraction reuses the same prompt
+        self._last_prompt = (None, None)
     
     def extract_structured_data(self, document_text: str) -> Dict[str, Any]:
         """
@@ -65,43 +156,101 @@ class ExtractorAgent:
         """
         # Create extraction prompt
         prompt = self._create_extraction_prompt(document_text)
+        raw_response = None
         
         # Generate structured data
         try:
-            response = self.model.generate_content(
+            raw_response = generate_cached(
+                self.model,
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=1024,
-                )
+                self.model_name,
+                self._gen_cfg
             )
             
-            raw_response = response.text
-            
-            # Parse JSON from response
-            extracted_data = self._parse_json_response(raw_response)
+            return self._build_extraction_result(raw_response)
+        
+        except Exception as e:
+            return self._build_extraction_error(e, raw_response)
+    
+    async def aextract_structured_data(self, document_text: str) -> Dict[str, Any]:
+        """
+        Async variant of extract_structured_data using Gemini's async client.
+        
+        Args:
+            document_text: Full document text
             
-            # Validate and type-cast data
-            validated_data = self._validate_and_cast(extracted_data)
+        Returns:
+            Same dictionary as extract_structured_data
+        """
+        prompt = self._create_extraction_prompt(document_text)
+        raw_response = None
+        
+        try:
+            raw_response = await agenerate_cached(
+                self.model,
+                prompt,
+                self.model_name,
+                self._gen_cfg
+            )
             
-            return {
-                'data': validated_data,
-                'success': True,
-                'raw_response': raw_response
-            }
+            return self._build_extraction_result(raw_response)
         
         except Exception as e:
-            return {
-                'data': {},
-                'success': False,
-                'error': str(e),
-                'raw_response': raw_response if 'raw_response' in locals() else None
-            }
+            return self._build_extraction_error(e, raw_response)
+    
+    async def extract_many(self, documents: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract structured data from several documents concurrently.
+        
+        All Gemini calls are issued at once, so the total latency is roughly
+        that of the slowest call instead of the sum of all of them.
+        
+        Args:
+            documents: List of document texts
+            
+        Returns:
+            List of extraction results in input order
+        """
+        return await asyncio.gather(
+            *[self.aextract_structured_data(document) for document in documents]
+        )
+    
+    def _build_extraction_result(self, raw_response: str) -> Dict[str, Any]:
+        """Parse, validate and wrap a raw extraction response."""
+        # Parse JSON from response
+        extracted_data = self._parse_json_response(raw_response)
+        
+        # Validate and type-cast data
+        validated_data = self._validate_and_cast(extracted_data)
+        
+        return {
+            'data': validated_data,
+            'success': True,
+            'raw_response': raw_response
+        }
+    
+    @staticmethod
+    def _build_extraction_error(error: Exception, raw_response: str = None) -> Dict[str, Any]:
+        """Wrap an extraction failure in the standard result format."""
+        return {
+            'data': {},
+            'success': False,
+            'error': str(error),
+            'raw_response': raw_response
+        }
     
     def _create_extraction_prompt(self, document: str) -> str:
-        """Create the structured extraction prompt."""
+        """Create the structured extraction prompt, reusing it for the same document."""
+        last_document, last_prompt = self._last_prompt
+        if document is last_document:
+            return last_prompt
         
-        prompt = f"""You are a data extraction assistant. Extract structured information from the market research document below.
+        # The document leads the prompt so every document-level prompt shares
+        # a byte-identical prefix that Gemini's prefix cache can reuse.
+        prompt = f"""Document:
+{document}
+
+You are a data extraction assistant. Extract structured information from the market research document above.
 
 IMPORTANT: Output ONLY valid JSON. Do not include any explanatory text, markdown formatting, or code blocks.
 
@@ -134,11 +283,9 @@ Extract the following information into this exact JSON structure:
   "strategic_priorities": ["list of strategic priorities or recommendations"]
 }}
 
-Document:
-{document}
-
 JSON Output:"""
         
+        self._last_prompt = (document, prompt)
         return prompt
     
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
@@ -155,22 +302,45 @@ JSON Output:"""
         cleaned = response_text.strip()
         
         # Remove ```json and ``` markers
-        cleaned = re.sub(r'^```json\s*', '', cleaned)
-        cleaned = re.sub(r'^```\s*', '', cleaned)
-        cleaned = re.sub(r'\s*```$', '', cleaned)
+        cleaned = _RE_JSON_FENCE.sub('', cleaned)
         cleaned = cleaned.strip()
         
         # Try to find JSON object in the text
-        # Look for content between first { and last }
-        start_idx = cleaned.find('{')
-        end_idx = cleaned.rfind('}')
+        # Look for content between first { and last }. Both braces are
+        # almost always near the ends, so check a short window first.
+        start_idx = cleaned.find('{', 0, _BRACE_WINDOW)
+        if start_idx == -1:
+            start_idx = cleaned.find('{')
+        
+        end_idx = cleaned.rfind('}', max(0, len(cleaned) - _BRACE_WINDOW))
+        if end_idx == -1:
+            end_idx = cleaned.rfind('}')
         
         if start_idx != -1 and end_idx != -1:
-            json_str = cleaned[start_idx:end_idx + 1]
-            return json.loads(json_str)
-        else:
+            try:
+                return orjson.loads(cleaned[start_idx:end_idx + 1])
+            except orjson.JSONDecodeError:
+                pass
+        elif start_idx == -1:
             # Try parsing as-is
-            return json.loads(cleaned)
+            return orjson.loads(cleaned)
+        
+        # Malformed or truncated object: balance brackets and retry
+        logger.warning("Extraction response is not valid JSON, salvaging complete fields")
+        return orjson.loads(_salvage_json_object(cleaned))
+    
+    @staticmethod
+    def _to_number(value: Any) -> Any:
+        """
+        Convert strings like "12%" or "12.5 percent" to float.
+        
+        Non-string values and strings without a number are returned unchanged.
+        """
+        if not isinstance(value, str):
+            return value
+        
+        match = _RE_NUM.search(value)
+        return float(match.group(1)) if match else value
     
     def _validate_and_cast(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -183,25 +353,14 @@ JSON Output:"""
             Validated and type-cast data
         """
         # Ensure numeric fields are properly typed
-        if 'market_share' in data and isinstance(data['market_share'], str):
-            try:
-                # Extract number from string like "12%" or "12"
-                numeric_str = re.search(r'(\d+\.?\d*)', data['market_share'])
-                if numeric_str:
-                    data['market_share'] = float(numeric_str.group(1))
-            except:
-                pass
+        if 'market_share' in data:
+            data['market_share'] = self._to_number(data['market_share'])
         
         # Validate competitors list
         if 'competitors' in data and isinstance(data['competitors'], list):
             for competitor in data['competitors']:
-                if isinstance(competitor.get('market_share'), str):
-                    try:
-                        numeric_str = re.search(r'(\d+\.?\d*)', competitor['market_share'])
-                        if numeric_str:
-                            competitor['market_share'] = float(numeric_str.group(1))
-                    except:
-                        pass
+                if isinstance(competitor, dict) and 'market_share' in competitor:
+                    competitor['market_share'] = self._to_number(competitor['market_share'])
         
         # Ensure SWOT categories exist
         if 'swot' not in data:
@@ -230,24 +389,23 @@ JSON Output:"""
             Extracted data matching the schema
         """
         # Build custom schema string
-        schema_str = json.dumps(field_schema, indent=2)
+        schema_str = orjson.dumps(field_schema, option=orjson.OPT_INDENT_2).decode()
         
-        prompt = f"""Extract the following fields from the document.
+        prompt = f"""Document:
+{document_text}
+
+Extract the following fields from the document above.
 Output ONLY valid JSON matching this schema:
 
 {schema_str}
 
-Document:
-{document_text}
-
 JSON Output:"""
         
-        response = self.model.generate_content(
+        raw_response = generate_cached(
+            self.model,
             prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=1024,
-            )
+            self.model_name,
+            self._gen_cfg
         )
         
-        return self._parse_json_response(response.text)
+        return self._parse_json_response(raw_response)
@@ -2,7 +2,37 @@
 Question Answering Agent using RAG.
 """
 import google.generativeai as genai
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional
+import re
+
+from ._gemini import ensure_configured, get_model
+from ._llm_cache import generate_cached, agenerate_cached, stream_cached
+from ..retrieval import SemanticCache
+
+
+# Phrases indicating the model could not answer from the context
+UNCERTAINTY_PHRASES = (
+    "i don't have",
+    "insufficient information",
+    "not mentioned",
+    "unclear",
+    "cannot determine",
+    "not specified"
+)
+
+# Single-pass matcher for all uncertainty phrases
+_RE_UNCERTAINTY = re.compile("|".join(re.escape(phrase) for phrase in UNCERTAINTY_PHRASES))
+
+# Static part of the QA prompt; only the context and question vary
+_QA_PROMPT_PREFIX = """You are a helpful AI assistant answering questions about a market research document.
+
+Answer the question based ONLY on the provided context below.
+If the information is not in the context, say "I don't have sufficient information to answer this question."
+Cite sources in your answer using [Source N] notation.
+Be concise but comprehensive.
+
+Context:
+"""
 
 
 class QAAgent:
@@ -13,7 +43,13 @@ class QAAgent:
     contextual answers using Gemini's generation capabilities.
     """
     
-    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash-exp", temperature: float = 0.2):
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.0-flash-exp",
+        temperature: float = 0.2,
+        semantic_cache: Optional[SemanticCache] = None
+    ):
         """
         Initialize the QA agent.
         
@@ -21,17 +57,48 @@ class QAAgent:
             api_key: Google Gemini API key
             model_name: Name of the generation model
             temperature: Sampling temperature (0.0 to 1.0)
+            semantic_cache: Optional cache of answers keyed by question embedding
         """
-        genai.configure(api_key=api_key)
+        ensure_configured(api_key)
         self.model_name = model_name
         self.temperature = temperature
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_model(model_name)
+        self._gen_cfg = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=512,
+        )
+        self.semantic_cache = semantic_cache
+    
+    def get_cached_answer(
+        self,
+        query_embedding: List[float],
+        top_k: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer to a semantically equivalent earlier question.
+        
+        Callers should check this before retrieval: a hit skips both the
+        vector store query and generation.
+        
+        Args:
+            query_embedding: Embedding of the user's question
+            top_k: Retrieval top_k the caller would use; only answers built
+                from the same number of chunks are reused
+            
+        Returns:
+            The cached answer dictionary, or None on a miss
+        """
+        if self.semantic_cache is None:
+            return None
+        return self.semantic_cache.lookup(query_embedding, scope=top_k)
     
     def answer_question(
         self,
         question: str,
         context_chunks: List[str],
-        metadata: List[Dict] = None
+        metadata: List[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        top_k: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Answer a question based on retrieved context.
@@ -40,6 +107,10 @@ class QAAgent:
             question: The user's question
             context_chunks: List of relevant text chunks
             metadata: Optional metadata for each chunk
+            query_embedding: Optional question embedding; when given, the
+                answer is stored in the semantic cache
+            top_k: Retrieval top_k the context chunks came from; the cached
+                answer is only reused for lookups with the same top_k
             
         Returns:
             Dictionary containing:
@@ -53,54 +124,134 @@ class QAAgent:
         # Create prompt
         prompt = self._create_qa_prompt(question, context)
         
-        # Generate answer
-        response = self.model.generate_content(
+        # Generate answer (repeated prompts are served from the cache)
+        answer_text = generate_cached(
+            self.model,
             prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=self.temperature,
-                max_output_tokens=512,
-            )
+            self.model_name,
+            self._gen_cfg
         )
         
-        answer_text = response.text
+        return self._build_result(
+            answer_text, context_chunks, metadata, query_embedding, top_k
+        )
+    
+    async def aanswer_question(
+        self,
+        question: str,
+        context_chunks: List[str],
+        metadata: List[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of answer_question using Gemini's async client.
         
+        Args:
+            question: The user's question
+            context_chunks: List of relevant text chunks
+            metadata: Optional metadata for each chunk
+            query_embedding: Optional question embedding for the semantic cache
+            top_k: Retrieval top_k the context chunks came from
+            
+        Returns:
+            Same dictionary as answer_question
+        """
+        context = self._build_context(context_chunks, metadata)
+        prompt = self._create_qa_prompt(question, context)
+        
+        answer_text = await agenerate_cached(
+            self.model,
+            prompt,
+            self.model_name,
+            self._gen_cfg
+        )
+        
+        return self._build_result(
+            answer_text, context_chunks, metadata, query_embedding, top_k
+        )
+    
+    def answer_stream(
+        self,
+        question: str,
+        context_chunks: List[str],
+        metadata: List[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        top_k: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Answer a question, yielding text as it is generated.
+        
+        Args:
+            question: The user's question
+            context_chunks: List of relevant text chunks
+            metadata: Optional metadata for each chunk
+            query_embedding: Optional question embedding for the semantic cache
+            top_k: Retrieval top_k the context chunks came from
+            
+        Yields:
+            {'type': 'chunk', 'text': ...} for each generated piece, then
+            {'type': 'done', ...} with the same fields as answer_question
+            (confidence is computed once the full answer is known)
+        """
+        context = self._build_context(context_chunks, metadata)
+        prompt = self._create_qa_prompt(question, context)
+        
+        parts = []
+        for text in stream_cached(
+            self.model,
+            prompt,
+            self.model_name,
+            self._gen_cfg
+        ):
+            parts.append(text)
+            yield {'type': 'chunk', 'text': text}
+        
+        result = self._build_result(
+            "".join(parts), context_chunks, metadata, query_embedding, top_k
+        )
+        yield {'type': 'done', **result}
+    
+    def _build_result(
+        self,
+        answer_text: str,
+        context_chunks: List[str],
+        metadata: Optional[List[Dict]],
+        query_embedding: Optional[List[float]],
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Assemble the answer dictionary and store it in the semantic cache."""
         # Estimate confidence
         confidence = self._estimate_confidence(answer_text, context_chunks)
         
-        return {
+        result = {
             'answer': answer_text,
             'sources': context_chunks,
             'source_metadata': metadata if metadata else [],
             'confidence': confidence
         }
+        
+        if self.semantic_cache is not None and query_embedding is not None:
+            self.semantic_cache.add(query_embedding, result, scope=top_k)
+        
+        return result
     
     def _build_context(self, chunks: List[str], metadata: List[Dict] = None) -> str:
-        """Build formatted context from chunks."""
-        context_parts = []
-        
-        for i, chunk in enumerate(chunks):
-            source_num = i + 1
-            context_parts.append(f"[Source {source_num}]\n{chunk}\n")
+        """
+        Build formatted context from chunks.
         
-        return "\n".join(context_parts)
+        Source numbers follow retrieval order (they are what the model cites
+        as [Source N]), so headers are formatted here rather than stored
+        with each chunk at index time.
+        """
+        return "\n".join(
+            f"[Source {source_num}]\n{chunk}\n"
+            for source_num, chunk in enumerate(chunks, 1)
+        )
     
     def _create_qa_prompt(self, question: str, context: str) -> str:
         """Create the QA prompt template."""
-        prompt = f"""You are a helpful AI assistant answering questions about a market research document.
-
-Answer the question based ONLY on the provided context below.
-If the information is not in the context, say "I don't have sufficient information to answer this question."
-Cite sources in your answer using [Source N] notation.
-Be concise but comprehensive.
-
-Context:
-{context}
-
-Question: {question}
-
-Answer:"""
-        
-        return prompt
+        return f"{_QA_PROMPT_PREFIX}{context}\n\nQuestion: {question}\n\nAnswer:"
     
     def _estimate_confidence(self, answer: str, context_chunks: List[str]) -> float:
         """
@@ -111,18 +262,8 @@ Answer:"""
         answer_lower = answer.lower()
         
         # Check for uncertainty indicators
-        uncertainty_phrases = [
-            "i don't have",
-            "insufficient information",
-            "not mentioned",
-            "unclear",
-            "cannot determine",
-            "not specified"
-        ]
-        
-        for phrase in uncertainty_phrases:
-            if phrase in answer_lower:
-                return 0.0
+        if _RE_UNCERTAINTY.search(answer_lower):
+            return 0.0
         
         # Check for citation presence
         has_citations = "[source" in answer_lower
@@ -2,13 +2,70 @@
 Router Agent for Autonomous Tool Selection (Bonus Feature 1).
 """
 import google.generativeai as genai
-from typing import Dict, Any, Literal
-import json
+from collections import OrderedDict
+from typing import Awaitable, Dict, Any, List, Literal, Optional
+import asyncio
+import logging
 import re
+import threading
+import time
+import numpy as np
+import orjson
 
+from ._gemini import ensure_configured, get_model
+from ..retrieval import GeminiEmbedder, SemanticCache
+
+
+logger = logging.getLogger(__name__)
 
 ToolType = Literal["qa", "summarize", "extract"]
 
+# Runs of whitespace collapsed when normalizing queries
+_RE_WHITESPACE = re.compile(r"\s+")
+
+# Markdown code fence around a JSON response (leading or trailing)
+_RE_JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+# Keyword patterns for the heuristic fast path (one match = confident route)
+_RE_QA = re.compile(r"^\s*(what|who|when|where|why|how|which|is|are|does|do)\b", re.I)
+_RE_SUMMARIZE = re.compile(r"\b(summar\w*|overview|tl;?dr|key (points|takeaways)|main points)\b", re.I)
+_RE_EXTRACT = re.compile(r"\b(extract\w*|list|json|fields?|metrics?|competitors?|swot)\b", re.I)
+
+
+# Canonical queries per tool for the nearest-prototype router
+ROUTING_PROTOTYPES: Dict[str, List[str]] = {
+    "qa": [
+        "What is the projected CAGR?",
+        "What is the total market size?",
+        "What is the company's market share?",
+        "Who is the biggest competitor?",
+        "When is the next product launch?",
+        "Why is the company losing share in Europe?",
+        "How does the company compare with its rivals on price?",
+        "Which region is growing fastest?",
+    ],
+    "summarize": [
+        "Summarize this document",
+        "Give me an executive summary",
+        "What are the key takeaways of the report?",
+        "Provide a brief overview of the report",
+        "TL;DR of the market analysis",
+        "Give me the main points in a few sentences",
+        "Recap the findings of this report",
+        "Condense the report into a short brief",
+    ],
+    "extract": [
+        "Extract the market share as JSON",
+        "List all competitors with their market share",
+        "Give me the SWOT analysis as structured data",
+        "Pull out the key metrics into a table",
+        "Extract the company name, market size and CAGR",
+        "Return the strengths and weaknesses as a list",
+        "Output the financial figures as JSON fields",
+        "Get all numbers from the report in structured form",
+    ],
+}
+
 
 class RouterAgent:
     """
@@ -34,24 +91,52 @@ class RouterAgent:
        - LLM: Flexible, accurate, easy to improve
     
     3. Implementation Strategy:
+       - Unambiguous queries (exactly one keyword pattern matches) are
+         routed by a regex fast path; only ambiguous ones reach the LLM
+       - With an embedder, queries close to one tool's canonical examples
+         (ROUTING_PROTOTYPES) and clearly farther from the others are
+         routed without the LLM
        - Use low temperature for consistent routing
        - Provide clear tool descriptions
        - Request JSON output for easy parsing
        - Include confidence score for ambiguous cases
     """
     
-    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash-exp"):
+    # Seconds to wait before retrying a failed prototype embedding
+    PROTOTYPE_RETRY_SECONDS = 300
+    
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.0-flash-exp",
+        embedder: Optional[GeminiEmbedder] = None,
+        cache_threshold: float = 0.9,
+        cache_size: int = 1024,
+        exact_cache_size: int = 2048,
+        prototype_threshold: float = 0.7,
+        prototype_margin: float = 0.1
+    ):
         """
         Initialize the router agent.
         
         Args:
             api_key: Google Gemini API key
             model_name: Name of the generation model
+            embedder: Optional embedder; enables the semantic routing cache
+            cache_threshold: Minimum cosine similarity for a routing cache hit
+            cache_size: Maximum number of cached routing decisions
+            exact_cache_size: Maximum number of exact-match cache entries
+            prototype_threshold: Minimum similarity to a tool's closest prototype
+            prototype_margin: Minimum lead over the next-best tool's prototype
         """
-        genai.configure(api_key=api_key)
+        ensure_configured(api_key)
         self.model_name = model_name
         self.temperature = 0.1  # Low temperature for consistent routing
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_model(model_name)
+        self._gen_cfg = genai.types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=256,
+        )
         
         # Tool descriptions for the router
         self.tool_descriptions = {
@@ -59,13 +144,64 @@ class RouterAgent:
             "summarize": "Generate summaries or overviews. Use when user wants a summary, overview, main points, or key takeaways.",
             "extract": "Extract structured data as JSON. Use when user wants specific data points, metrics, lists, or structured information."
         }
+        
+        # Only the query varies between routing prompts, so the rest is built once
+        self._tools_block = f"""Available Tools:
+1. "qa" - Question Answering: {self.tool_descriptions['qa']}
+2. "summarize" - Summarization: {self.tool_descriptions['summarize']}
+3. "extract" - Data Extraction: {self.tool_descriptions['extract']}"""
+        
+        self._prompt_prefix = f"""You are a routing assistant that decides which tool should handle a user's query.
+
+{self._tools_block}
+
+Analyze the user's query and select the most appropriate tool.
+
+User Query: \""""
+        
+        self._prompt_suffix = """"
+
+Respond with ONLY a JSON object in this format:
+{
+  "tool": "qa" | "summarize" | "extract",
+  "confidence": 0.0 to 1.0,
+  "reasoning": "brief explanation of why this tool was chosen"
+}
+
+JSON Response:"""
+        
+        # Exact-match LRU keyed on the normalized query (checked first)
+        self._exact_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._exact_cache_size = exact_cache_size
+        self._exact_lock = threading.Lock()
+        
+        # Semantic routing cache: near-duplicate queries reuse the decision
+        self.embedder = embedder
+        self.route_cache = None
+        if embedder is not None:
+            self.route_cache = SemanticCache(threshold=cache_threshold, max_entries=cache_size)
+        
+        # Nearest-prototype routing, embedded on first use
+        self.prototype_threshold = prototype_threshold
+        self.prototype_margin = prototype_margin
+        self._proto_matrix: Optional[np.ndarray] = None
+        self._proto_slices: Dict[str, slice] = {}
+        self._proto_lock = threading.Lock()
+        self._proto_failed_at: Optional[float] = None
     
-    def route(self, user_query: str) -> Dict[str, Any]:
+    def route(
+        self,
+        user_query: str,
+        query_embedding: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
         """
         Route the user query to the appropriate tool.
         
         Args:
             user_query: Natural language query from user
+            query_embedding: Optional embedding of user_query already
+                computed by the caller; used for the routing cache and
+                prototypes instead of embedding the query again
             
         Returns:
             Dictionary containing:
@@ -73,6 +209,216 @@ class RouterAgent:
             - confidence: Confidence score (0.0 to 1.0)
             - reasoning: Explanation for the choice
         """
+        key = self._normalize(user_query)
+        
+        # 1-2. Exact repeat or unambiguous keyword match
+        fast_decision = self._route_fast(key, user_query)
+        if fast_decision is not None:
+            return fast_decision
+        
+        # 3. Near-duplicate of a previous query
+        if self.route_cache is None:
+            query_embedding = None
+        elif query_embedding is None:
+            query_embedding = self._embed_for_cache(key)
+        
+        if query_embedding is not None:
+            cached = self.route_cache.lookup(query_embedding)
+            if cached is not None:
+                self._remember(key, cached)
+                return dict(cached)
+            
+            # 4. Close to one tool's canonical examples
+            prototype_decision = self._prototype_route(query_embedding)
+            if prototype_decision is not None:
+                self._remember(key, prototype_decision)
+                return prototype_decision
+        
+        # 5. Ask the LLM
+        routing_decision = self._route_with_llm(user_query)
+        
+        # Only cache real decisions, not error fallbacks
+        if 'error' not in routing_decision:
+            self._remember(key, routing_decision)
+            if query_embedding is not None:
+                self.route_cache.add(query_embedding, routing_decision)
+        
+        return routing_decision
+    
+    async def aroute(
+        self,
+        user_query: str,
+        query_embedding: Optional[Awaitable[List[float]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of route.
+        
+        Cache and keyword hits are answered inline; anything that may need
+        an embedding or LLM call runs route() in a worker thread.
+        
+        Args:
+            user_query: Natural language query from user
+            query_embedding: Optional pending embedding of user_query (e.g. a
+                task started for retrieval); awaited only when the fast path
+                misses, and reused instead of embedding the query again
+            
+        Returns:
+            Routing decision (see route)
+        """
+        fast_decision = self._route_fast(self._normalize(user_query), user_query)
+        if fast_decision is not None:
+            return fast_decision
+        
+        embedding = None
+        if query_embedding is not None and self.route_cache is not None:
+            try:
+                embedding = await query_embedding
+            except Exception as e:
+                logger.warning(f"Shared query embedding failed: {e}")
+        
+        return await asyncio.to_thread(self.route, user_query, embedding)
+    
+    def _route_fast(self, key: str, user_query: str) -> Optional[Dict[str, Any]]:
+        """Return a decision from the exact-match LRU or keyword heuristic, if any."""
+        with self._exact_lock:
+            cached = self._exact_cache.get(key)
+            if cached is not None:
+                self._exact_cache.move_to_end(key)
+                return dict(cached)
+        
+        return self._heuristic_route(user_query)
+    
+    def _prototype_route(self, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Route by similarity to the canonical examples in ROUTING_PROTOTYPES.
+        
+        Returns:
+            A routing decision if the best tool's closest prototype scores at
+            least prototype_threshold and leads the next tool by
+            prototype_margin, otherwise None
+        """
+        matrix = self._get_prototypes()
+        if matrix is None:
+            return None
+        
+        q_vec = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q_vec)
+        if norm == 0:
+            return None
+        
+        sims = matrix @ (q_vec / norm)
+        scores = sorted(
+            ((float(sims[rows].max()), tool) for tool, rows in self._proto_slices.items()),
+            reverse=True
+        )
+        (best, tool), (second, _) = scores[0], scores[1]
+        
+        if best < self.prototype_threshold or best - second < self.prototype_margin:
+            return None
+        
+        return {
+            'tool': tool,
+            'confidence': round(best, 2),
+            'reasoning': 'prototype match'
+        }
+    
+    def _get_prototypes(self) -> Optional[np.ndarray]:
+        """
+        Embed ROUTING_PROTOTYPES once; None if the embedding call fails.
+        
+        After a failure, prototype routing is skipped (queries go on to the
+        LLM) for PROTOTYPE_RETRY_SECONDS before the embedding is retried.
+        """
+        if self._proto_matrix is not None:
+            return self._proto_matrix
+        if self._prototypes_backing_off():
+            return None
+        
+        with self._proto_lock:
+            if self._proto_matrix is None:
+                if self._prototypes_backing_off():
+                    return None
+                
+                texts: List[str] = []
+                for tool, examples in ROUTING_PROTOTYPES.items():
+                    self._proto_slices[tool] = slice(len(texts), len(texts) + len(examples))
+                    texts.extend(examples)
+                
+                try:
+                    matrix = np.asarray(self.embedder.embed_queries(texts), dtype=np.float32)
+                except Exception as e:
+                    logger.warning(
+                        f"Embedding routing prototypes failed, retrying in "
+                        f"{self.PROTOTYPE_RETRY_SECONDS}s: {e}"
+                    )
+                    self._proto_failed_at = time.monotonic()
+                    return None
+                
+                self._proto_matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        
+        return self._proto_matrix
+    
+    def _prototypes_backing_off(self) -> bool:
+        """Whether a recent prototype embedding failure is still in its backoff window."""
+        failed_at = self._proto_failed_at
+        return (
+            failed_at is not None
+            and time.monotonic() - failed_at < self.PROTOTYPE_RETRY_SECONDS
+        )
+    
+    def _remember(self, key: str, routing_decision: Dict[str, Any]) -> None:
+        """Store a decision in the exact-match LRU, evicting the oldest entry."""
+        with self._exact_lock:
+            self._exact_cache[key] = routing_decision
+            self._exact_cache.move_to_end(key)
+            if len(self._exact_cache) > self._exact_cache_size:
+                self._exact_cache.popitem(last=False)
+    
+    @staticmethod
+    def _heuristic_route(query: str) -> Optional[Dict[str, Any]]:
+        """
+        Route by keyword when exactly one tool's pattern matches.
+        
+        Returns:
+            A routing decision, or None if no pattern or several patterns
+            match (the query is ambiguous and needs the LLM)
+        """
+        matches = [
+            tool for tool, pattern in (
+                ("qa", _RE_QA),
+                ("summarize", _RE_SUMMARIZE),
+                ("extract", _RE_EXTRACT)
+            )
+            if pattern.search(query)
+        ]
+        
+        if len(matches) != 1:
+            return None
+        
+        return {
+            'tool': matches[0],
+            'confidence': 0.95,
+            'reasoning': 'heuristic'
+        }
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Normalize a query for caching (lowercase, collapse whitespace)."""
+        return _RE_WHITESPACE.sub(" ", query.strip().lower())
+    
+    def _embed_for_cache(self, normalized_query: str) -> Optional[List[float]]:
+        """Embed a normalized query for the routing cache, or None if disabled/failed."""
+        if self.route_cache is None:
+            return None
+        
+        try:
+            return self.embedder.embed_query(normalized_query)
+        except Exception as e:
+            logger.warning(f"Routing cache embedding failed: {e}")
+            return None
+    
+    def _route_with_llm(self, user_query: str) -> Dict[str, Any]:
+        """Ask Gemini for a routing decision, falling back to Q&A on error."""
         # Create routing prompt
         prompt = self._create_routing_prompt(user_query)
         
@@ -80,10 +426,7 @@ class RouterAgent:
             # Get routing decision
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=256,
-                )
+                generation_config=self._gen_cfg
             )
             
             # Parse response
@@ -102,51 +445,38 @@ class RouterAgent:
     
     def _create_routing_prompt(self, query: str) -> str:
         """Create the routing decision prompt."""
-        
-        prompt = f"""You are a routing assistant that decides which tool should handle a user's query.
-
-Available Tools:
-1. "qa" - Question Answering: {self.tool_descriptions['qa']}
-2. "summarize" - Summarization: {self.tool_descriptions['summarize']}
-3. "extract" - Data Extraction: {self.tool_descriptions['extract']}
-
-Analyze the user's query and select the most appropriate tool.
-
-User Query: "{query}"
-
-Respond with ONLY a JSON object in this format:
-{{
-  "tool": "qa" | "summarize" | "extract",
-  "confidence": 0.0 to 1.0,
-  "reasoning": "brief explanation of why this tool was chosen"
-}}
-
-JSON Response:"""
-        
-        return prompt
+        return self._prompt_prefix + query + self._prompt_suffix
     
     def _parse_routing_response(self, response_text: str) -> Dict[str, Any]:
         """Parse the routing decision from model response."""
         
-        # Clean response
-        cleaned = response_text.strip()
+        # Fast path: the object span parses directly, fenced or not
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}')
         
-        # Remove markdown code blocks
-        cleaned = re.sub(r'^```json\s*', '', cleaned)
-        cleaned = re.sub(r'^```\s*', '', cleaned)
-        cleaned = re.sub(r'\s*```$', '', cleaned)
-        cleaned = cleaned.strip()
+        if start_idx != -1 and end_idx != -1:
+            try:
+                return self._validate_decision(orjson.loads(response_text[start_idx:end_idx + 1]))
+            except orjson.JSONDecodeError:
+                pass
         
-        # Extract JSON
-        start_idx = cleaned.find('{')
-        end_idx = cleaned.rfind('}')
+        routing_data = orjson.loads(self._strip_code_fence(response_text))
         
-        if start_idx != -1 and end_idx != -1:
-            json_str = cleaned[start_idx:end_idx + 1]
-            routing_data = json.loads(json_str)
-        else:
-            routing_data = json.loads(cleaned)
+        return self._validate_decision(routing_data)
+    
+    @staticmethod
+    def _strip_code_fence(response_text: str) -> str:
+        """Strip surrounding whitespace and markdown code fences."""
+        # Clean response
+        cleaned = response_text.strip()
         
+        # Remove markdown code blocks
+        cleaned = _RE_JSON_FENCE.sub('', cleaned)
+        return cleaned.strip()
+    
+    @staticmethod
+    def _validate_decision(routing_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Default invalid tool choices to Q&A."""
         # Validate tool choice
         if routing_data.get('tool') not in ['qa', 'summarize', 'extract']:
             # Default to qa if invalid
@@ -190,10 +520,101 @@ Routing Decision:
         """
         Route multiple queries at once.
         
+        Queries answered by the exact-match cache or keyword heuristic are
+        resolved locally; the rest are routed with a single Gemini call that
+        returns a JSON array. If that response can't be parsed or has the
+        wrong length, each remaining query falls back to route().
+        
         Args:
             queries: List of user queries
             
         Returns:
-            List of routing decisions
+            List of routing decisions, in input order
         """
-        return [self.route(query) for query in queries]
+        decisions: list[Optional[Dict[str, Any]]] = []
+        pending: list[int] = []
+        
+        for i, query in enumerate(queries):
+            decision = self._route_fast(self._normalize(query), query)
+            decisions.append(decision)
+            if decision is None:
+                pending.append(i)
+        
+        if len(pending) == 1:
+            decisions[pending[0]] = self.route(queries[pending[0]])
+        elif pending:
+            pending_queries = [queries[i] for i in pending]
+            
+            try:
+                response = self.model.generate_content(
+                    self._create_batch_routing_prompt(pending_queries),
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=self.temperature,
+                        max_output_tokens=128 * len(pending_queries)
+                    )
+                )
+                batch_decisions = self._parse_batch_routing_response(
+                    response.text, len(pending_queries)
+                )
+            except Exception as e:
+                logger.warning(f"Batch routing failed, routing individually: {e}")
+                batch_decisions = [self.route(query) for query in pending_queries]
+            else:
+                for i, decision in zip(pending, batch_decisions):
+                    self._remember(self._normalize(queries[i]), decision)
+            
+            for i, decision in zip(pending, batch_decisions):
+                decisions[i] = decision
+        
+        return decisions
+    
+    def _create_batch_routing_prompt(self, queries: list[str]) -> str:
+        """Create a routing prompt covering several numbered queries."""
+        numbered = "\n".join(f'{i}: "{query}"' for i, query in enumerate(queries))
+        
+        prompt = f"""You are a routing assistant that decides which tool should handle each user query.
+
+{self._tools_block}
+
+Route each of the following queries. Respond with ONLY a JSON array of {len(queries)} objects, one per query in input order, each in this format:
+{{
+  "tool": "qa" | "summarize" | "extract",
+  "confidence": 0.0 to 1.0,
+  "reasoning": "brief explanation of why this tool was chosen"
+}}
+
+User Queries:
+{numbered}
+
+JSON Response:"""
+        
+        return prompt
+    
+    @classmethod
+    def _parse_batch_routing_response(cls, response_text: str, expected: int) -> list[Dict[str, Any]]:
+        """
+        Parse a JSON array of routing decisions.
+        
+        Raises:
+            ValueError: If the response is not an array of `expected` objects
+        """
+        start_idx = response_text.find('[')
+        end_idx = response_text.rfind(']')
+        
+        # Fast path: the array span parses directly, fenced or not
+        routing_data = None
+        if start_idx != -1 and end_idx != -1:
+            try:
+                routing_data = orjson.loads(response_text[start_idx:end_idx + 1])
+            except orjson.JSONDecodeError:
+                pass
+        
+        if routing_data is None:
+            routing_data = orjson.loads(cls._strip_code_fence(response_text))
+        
+        if not isinstance(routing_data, list) or len(routing_data) != expected:
+            raise ValueError(f"Expected a JSON array of {expected} routing decisions")
+        if not all(isinstance(item, dict) for item in routing_data):
+            raise ValueError("Routing decisions must be JSON objects")
+        
+        return [cls._validate_decision(item) for item in routing_data]
@@ -2,7 +2,36 @@
 Document Summarization Agent.
 """
 import google.generativeai as genai
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
+
+from ._gemini import ensure_configured, get_model
+from ._llm_cache import generate_cached, stream_cached
+
+
+# Per-type instructions, built once rather than on every prompt
+_SUMMARY_INSTRUCTIONS = {
+    "comprehensive": """
+Include:
+- Company overview and main product
+- Market size and growth projections
+- Competitive position and key competitors
+- Main strengths, weaknesses, opportunities, and threats
+- Strategic recommendations""",
+    "executive": """
+Focus on:
+- Key business metrics (market share, market size)
+- Critical insights for decision-makers
+- Top 3 strategic priorities
+Keep it concise and action-oriented.""",
+    "key_findings": """
+Extract only:
+- Most important market insights
+- Critical competitive intelligence
+- Key strategic recommendations
+Present as bullet points."""
+}
+
+_DEFAULT_SUMMARY_INSTRUCTION = "Provide a balanced overview of the document's main points."
 
 
 class SummarizerAgent:
@@ -19,10 +48,14 @@ class SummarizerAgent:
             model_name: Name of the generation model
             temperature: Sampling temperature (slightly higher for creative summarization)
         """
-        genai.configure(api_key=api_key)
+        ensure_configured(api_key)
         self.model_name = model_name
         self.temperature = temperature
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_model(model_name)
+        self._insights_cfg = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=400,
+        )
     
     def summarize(
         self,
@@ -47,16 +80,14 @@ class SummarizerAgent:
         # Create prompt based on summary type
         prompt = self._create_summary_prompt(document_text, summary_type, max_words)
         
-        # Generate summary
-        response = self.model.generate_content(
+        # Generate summary (shares cache entries with summarize_stream)
+        summary_text = generate_cached(
+            self.model,
             prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=self.temperature,
-                max_output_tokens=max_words * 2,  # Rough token estimate
-            )
+            self.model_name,
+            self._summary_config(max_words)
         )
         
-        summary_text = response.text
         word_count = len(summary_text.split())
         
         return {
@@ -66,45 +97,67 @@ class SummarizerAgent:
             'requested_max_words': max_words
         }
     
-    def _create_summary_prompt(self, document: str, summary_type: str, max_words: int) -> str:
-        """Create the appropriate summary prompt based on type."""
+    def summarize_stream(
+        self,
+        document_text: str,
+        summary_type: str = "comprehensive",
+        max_words: int = 200
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a summary, yielding text as it is generated.
         
-        base_instruction = f"Summarize the following market research document in approximately {max_words} words or less."
+        Args:
+            document_text: Full document text or concatenated chunks
+            summary_type: Type of summary ("comprehensive", "executive", "key_findings")
+            max_words: Maximum length of summary in words
+            
+        Yields:
+            {'type': 'chunk', 'text': ...} for each generated piece, then
+            {'type': 'done', ...} with the same fields as summarize
+        """
+        prompt = self._create_summary_prompt(document_text, summary_type, max_words)
         
-        if summary_type == "comprehensive":
-            specific_instruction = """
-Include:
-- Company overview and main product
-- Market size and growth projections
-- Competitive position and key competitors
-- Main strengths, weaknesses, opportunities, and threats
-- Strategic recommendations"""
+        parts = []
+        for text in stream_cached(
+            self.model,
+            prompt,
+            self.model_name,
+            self._summary_config(max_words)
+        ):
+            parts.append(text)
+            yield {'type': 'chunk', 'text': text}
         
-        elif summary_type == "executive":
-            specific_instruction = """
-Focus on:
-- Key business metrics (market share, market size)
-- Critical insights for decision-makers
-- Top 3 strategic priorities
-Keep it concise and action-oriented."""
+        summary_text = "".join(parts)
         
-        elif summary_type == "key_findings":
-            specific_instruction = """
-Extract only:
-- Most important market insights
-- Critical competitive intelligence
-- Key strategic recommendations
-Present as bullet points."""
+        yield {
+            'type': 'done',
+            'summary': summary_text,
+            'summary_type': summary_type,
+            'word_count': len(summary_text.split()),
+            'requested_max_words': max_words
+        }
+    
+    def _summary_config(self, max_words: int) -> genai.types.GenerationConfig:
+        """Generation settings for a summary of max_words (part of the cache key)."""
+        return genai.types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=max_words * 2,  # Rough token estimate
+        )
+    
+    def _create_summary_prompt(self, document: str, summary_type: str, max_words: int) -> str:
+        """Create the appropriate summary prompt based on type."""
         
-        else:
-            specific_instruction = "Provide a balanced overview of the document's main points."
+        base_instruction = f"Summarize the market research document above in approximately {max_words} words or less."
+        specific_instruction = _SUMMARY_INSTRUCTIONS.get(summary_type, _DEFAULT_SUMMARY_INSTRUCTION)
         
-        prompt = f"""{base_instruction}
+        # The document leads the prompt so all summary types share a
+        # byte-identical prefix that Gemini's prefix cache can reuse.
+        prompt = f"""Document:
+{document}
 
-{specific_instruction}
+{base_instruction}
 
-Document:
-{document}
+{specific_instruction}
 
 Summary:"""
         
@@ -120,23 +173,20 @@ Summary:"""
         Returns:
             Dictionary with categorized insights
         """
-        prompt = f"""Analyze this market research document and provide strategic insights in the following categories:
+        prompt = f"""Document:
+{document_text}
+
+Analyze the market research document above and provide strategic insights in the following categories:
 
 1. Market Opportunity (1-2 sentences)
 2. Competitive Threats (1-2 sentences)
 3. Strategic Recommendations (2-3 key actions)
 
-Document:
-{document_text}
-
 Insights:"""
         
         response = self.model.generate_content(
             prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=self.temperature,
-                max_output_tokens=400,
-            )
+            generation_config=self._insights_cfg
         )
         
         return {
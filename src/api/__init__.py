@@ -1,5 +1,5 @@
 """API package initialization."""
-from .routes import router, initialize_components
+from .routes import router, initialize_components, shutdown_components, warm_caches
 from .schemas import *
 
-__all__ = ['router', 'initialize_components']
+__all__ = ['router', 'initialize_components', 'shutdown_components', 'warm_caches']
@@ -0,0 +1,125 @@
+"""
+Component providers for the API routes.
+
+Each provider builds its component on first use and returns the same
+instance afterwards (lru_cache with maxsize=1). Routes receive components
+through FastAPI's Depends, and startup calls the providers once to build
+everything before the first request.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+from ..config import settings
+from ..data import DocumentLoader, DocumentChunker
+from ..retrieval import GeminiEmbedder, BatchedEmbedder, VectorStore, SemanticCache
+from ..agents import QAAgent, SummarizerAgent, ExtractorAgent, RouterAgent
+
+
+@lru_cache(maxsize=1)
+def get_embedder() -> GeminiEmbedder:
+    """Return the shared embedder."""
+    return GeminiEmbedder(
+        api_key=settings.gemini_api_key,
+        model_name=settings.embedding_model,
+        query_cache_size=settings.query_embedding_cache_size
+    )
+
+
+@lru_cache(maxsize=1)
+def get_batched_embedder() -> BatchedEmbedder:
+    """Return the shared query-embedding batcher used by request handlers."""
+    return BatchedEmbedder(
+        get_embedder(),
+        max_batch_size=settings.embed_batch_size,
+        max_wait_ms=settings.embed_batch_wait_ms
+    )
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """Return the shared vector store."""
+    return VectorStore(
+        persist_directory=settings.vector_store_path,
+        collection_name="market_research"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_qa_agents() -> Tuple[QAAgent, ...]:
+    """
+    Return one Q&A agent per model in settings.qa_model_pool.
+    
+    All agents share a single semantic cache, so a cached answer is found
+    whichever agent produced it.
+    """
+    qa_cache = None
+    if settings.enable_semantic_cache:
+        qa_cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_size
+        )
+    
+    model_names = [
+        name.strip() for name in settings.qa_model_pool.split(",") if name.strip()
+    ] or [settings.generation_model]
+    
+    return tuple(
+        QAAgent(
+            api_key=settings.gemini_api_key,
+            model_name=model_name,
+            temperature=settings.temperature,
+            semantic_cache=qa_cache
+        )
+        for model_name in model_names
+    )
+
+
+def get_qa_agent() -> QAAgent:
+    """Return the primary Q&A agent (used for semantic cache lookups)."""
+    return get_qa_agents()[0]
+
+
+@lru_cache(maxsize=1)
+def get_summarizer_agent() -> SummarizerAgent:
+    """Return the shared summarizer agent."""
+    return SummarizerAgent(
+        api_key=settings.gemini_api_key,
+        model_name=settings.generation_model,
+        temperature=0.3
+    )
+
+
+@lru_cache(maxsize=1)
+def get_extractor_agent() -> ExtractorAgent:
+    """Return the shared extractor agent."""
+    return ExtractorAgent(
+        api_key=settings.gemini_api_key,
+        model_name=settings.generation_model
+    )
+
+
+@lru_cache(maxsize=1)
+def get_router_agent() -> RouterAgent:
+    """Return the shared router agent (with a semantic cache if enabled)."""
+    return RouterAgent(
+        api_key=settings.gemini_api_key,
+        model_name=settings.generation_model,
+        embedder=get_embedder() if settings.enable_route_cache else None,
+        cache_threshold=settings.route_cache_threshold
+    )
+
+
+@lru_cache(maxsize=1)
+def get_chunker() -> DocumentChunker:
+    """Return the shared document chunker."""
+    return DocumentChunker(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap
+    )
+
+
+@lru_cache(maxsize=1)
+def get_document_text() -> str:
+    """Return the full text of the market research document."""
+    loader = DocumentLoader()
+    return loader.load_document(settings.document_path)
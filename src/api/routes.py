@@ -1,14 +1,26 @@
 """
 API routes for the AI Market Analyst agent.
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+import asyncio
 import logging
+import orjson
 
 from ..config import settings
 from ..data import DocumentLoader
-from ..retrieval import GeminiEmbedder, VectorStore
-from ..agents import QAAgent, SummarizerAgent, ExtractorAgent, RouterAgent
+from ..retrieval import BatchedEmbedder, VectorStore
+from ..agents import (
+    QAAgent, SummarizerAgent, ExtractorAgent, RouterAgent,
+    configure_llm_cache, get_llm_cache, ensure_configured
+)
+from .dependencies import (
+    get_embedder, get_batched_embedder, get_vector_store, get_chunker, get_document_text,
+    get_qa_agent, get_qa_agents, get_summarizer_agent, get_extractor_agent, get_router_agent
+)
 from .schemas import (
     QARequest, QAResponse,
     SummarizeRequest, SummaryResponse,
@@ -24,88 +36,87 @@ logger = logging.getLogger(__name__)
 # Initialize router
 router = APIRouter(prefix="/api/v1", tags=["Market Analyst"])
 
-# Global instances (initialized in startup)
-embedder: GeminiEmbedder = None
-vector_store: VectorStore = None
-qa_agent: QAAgent = None
-summarizer_agent: SummarizerAgent = None
-extractor_agent: ExtractorAgent = None
-router_agent: RouterAgent = None
-document_text: str = None
+# Frequent questions answered at startup when WARM_CACHE_ON_START is set
+WARM_QUERIES = [
+    "What is the market size?",
+    "What is the projected CAGR?",
+    "What is Innovate Inc's market share?",
+    "Who are the main competitors?",
+    "What are the strengths and weaknesses in the SWOT analysis?",
+    "What are the strategic priorities?",
+]
+
+# Canonical query used to pick the chunks relevant to the extraction schema
+EXTRACTION_QUERY = (
+    "company name product industry report period market size CAGR "
+    "market share competitors SWOT strengths weaknesses opportunities threats "
+    "growth drivers strategic priorities"
+)
+
+
+def _batched(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of up to size items from an iterable."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 def initialize_components():
-    """Initialize all components on startup."""
-    global embedder, vector_store, qa_agent, summarizer_agent, extractor_agent, router_agent, document_text
-    
+    """Build all components on startup and index the document if needed."""
     try:
         logger.info("Initializing components...")
         
-        # Initialize embedder
-        embedder = GeminiEmbedder(
-            api_key=settings.gemini_api_key,
-            model_name=settings.embedding_model
-        )
+        # Configure the Gemini client once for all components
+        ensure_configured(settings.gemini_api_key)
         
-        # Initialize vector store
-        vector_store = VectorStore(
-            persist_directory=settings.vector_store_path,
-            collection_name="market_research"
+        # Configure the shared LLM response cache
+        configure_llm_cache(
+            enabled=settings.enable_llm_cache,
+            maxsize=settings.llm_cache_size,
+            redis_url=settings.redis_url or None,
+            ttl_seconds=settings.llm_cache_ttl
         )
         
-        # Initialize agents
-        qa_agent = QAAgent(
-            api_key=settings.gemini_api_key,
-            model_name=settings.generation_model,
-            temperature=settings.temperature
-        )
-        
-        summarizer_agent = SummarizerAgent(
-            api_key=settings.gemini_api_key,
-            model_name=settings.generation_model,
-            temperature=0.3
-        )
-        
-        extractor_agent = ExtractorAgent(
-            api_key=settings.gemini_api_key,
-            model_name=settings.generation_model
-        )
-        
-        router_agent = RouterAgent(
-            api_key=settings.gemini_api_key,
-            model_name=settings.generation_model
-        )
+        # Build each component once; routes reuse these instances
+        embedder = get_embedder()
+        get_batched_embedder()
+        vector_store = get_vector_store()
+        get_qa_agent()
+        get_summarizer_agent()
+        get_extractor_agent()
+        get_router_agent()
         
-        # Load and index document if vector store is empty
+        # Index document if vector store is empty
         if vector_store.get_collection_stats()['total_documents'] == 0:
             logger.info("Loading and indexing document...")
-            from ..data import DocumentChunker
             
-            # Load document
-            loader = DocumentLoader()
-            document_text = loader.load_document(settings.document_path)
-            
-            # Chunk document
-            chunker = DocumentChunker(
-                chunk_size=settings.chunk_size,
-                chunk_overlap=settings.chunk_overlap
-            )
-            chunks = chunker.chunk_document(document_text)
-            
-            # Generate embeddings
-            chunk_texts = [chunk['text'] for chunk in chunks]
-            embeddings = embedder.embed_batch(chunk_texts)
+            # Chunk document (streamed from disk for large documents, so
+            # indexing never holds the full text and all chunks at once)
+            chunker = get_chunker()
+            if settings.streaming_ingest:
+                chunks = chunker.iter_chunks(
+                    DocumentLoader.load_text_file_iter(settings.document_path)
+                )
+            else:
+                chunks = chunker.chunk_document(get_document_text())
             
-            # Add to vector store
-            vector_store.add_documents(chunks, embeddings)
+            # Embed and store in bounded batches (one API call per worker each)
+            indexed = 0
+            for batch in _batched(chunks, embedder.BATCH_SIZE * embedder.MAX_WORKERS):
+                embeddings = embedder.embed_batch([chunk['text'] for chunk in batch])
+                vector_store.add_documents(batch, embeddings)
+                indexed += len(batch)
+            vector_store.flush()
             
-            logger.info(f"Indexed {len(chunks)} chunks")
+            logger.info(f"Indexed {indexed} chunks")
         else:
-            # Just load document text for summarization/extraction
-            loader = DocumentLoader()
-            document_text = loader.load_document(settings.document_path)
             logger.info("Vector store already populated, skipping indexing")
         
+        # Load document text for summarization/extraction. It stays resident
+        # for /summarize and /extract; with streaming ingest it is only loaded
+        # after indexing has finished.
+        get_document_text()
+        
         logger.info("All components initialized successfully")
         
     except Exception as e:
@@ -113,16 +124,138 @@ def initialize_components():
         raise
 
 
+async def shutdown_components():
+    """Stop background work started by the components (the query batcher's worker)."""
+    if get_batched_embedder.cache_info().currsize:
+        await get_batched_embedder().aclose()
+
+
+def warm_caches():
+    """
+    Pre-populate the LLM response and semantic caches.
+    
+    Answers WARM_QUERIES and runs the default extraction once, so the first
+    users asking common questions are served from cache. Failures are logged
+    and never abort startup.
+    """
+    logger.info(f"Warming caches with {len(WARM_QUERIES)} queries...")
+    
+    embedder = get_embedder()
+    vector_store = get_vector_store()
+    qa_agent = get_qa_agent()
+    
+    for question in WARM_QUERIES:
+        try:
+            query_embedding = embedder.embed_query(question)
+            if qa_agent.get_cached_answer(query_embedding, settings.top_k_retrieval) is not None:
+                continue
+            
+            results = vector_store.query(
+                query_embedding=query_embedding,
+                top_k=settings.top_k_retrieval
+            )
+            if results['documents']:
+                _select_qa_agent(results['metadatas']).answer_question(
+                    question=question,
+                    context_chunks=results['documents'],
+                    metadata=results['metadatas'],
+                    query_embedding=query_embedding,
+                    top_k=settings.top_k_retrieval
+                )
+        except Exception as e:
+            logger.warning(f"Cache warm-up failed for '{question}': {e}")
+    
+    try:
+        get_extractor_agent().extract_structured_data(get_extraction_context())
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed for extraction: {e}")
+    
+    logger.info("Cache warm-up complete")
+
+
+@lru_cache(maxsize=1)
+def get_extraction_context() -> str:
+    """
+    Return the document text fed to the default extraction prompt.
+    
+    Documents up to settings.extraction_max_chars are used whole. Longer
+    documents are reduced to the chunks most relevant to the extraction
+    schema, in document order, within that budget, so prefill cost does not
+    grow with the size of the report. The result is computed once, since
+    the document is fixed for the lifetime of the process.
+    """
+    document_text = get_document_text()
+    
+    if len(document_text) <= settings.extraction_max_chars:
+        return document_text
+    
+    query_embedding = get_embedder().embed_query(EXTRACTION_QUERY)
+    results = get_vector_store().query(query_embedding=query_embedding, top_k=20)
+    
+    selected = []
+    total_chars = 0
+    for text, meta in zip(results['documents'], results['metadatas']):
+        if total_chars + len(text) > settings.extraction_max_chars:
+            continue
+        selected.append((meta.get('chunk_index', 0), text))
+        total_chars += len(text)
+    
+    selected.sort(key=lambda item: item[0])
+    extraction_context = "\n\n".join(text for _, text in selected)
+    
+    logger.info(
+        f"Extraction context reduced from {len(document_text)} to "
+        f"{len(extraction_context)} characters ({len(selected)} chunks)"
+    )
+    
+    return extraction_context
+
+
+def _select_qa_agent(metadatas: List[Dict[str, Any]]) -> QAAgent:
+    """
+    Pick the Q&A agent for a retrieved chunk set.
+    
+    The same set of chunks always goes to the same model, so repeated RAG
+    prompts land where the provider already holds their prefix cache. This
+    relies on the prompt being byte-identical for the same chunks: chunk
+    order comes from retrieval and the prompt contains no per-request data
+    other than the question, which comes last.
+    """
+    qa_agents = get_qa_agents()
+    if len(qa_agents) == 1:
+        return qa_agents[0]
+    
+    key = hash(tuple(sorted(meta.get('chunk_index', 0) for meta in metadatas)))
+    return qa_agents[key % len(qa_agents)]
+
+
+def _auto_qa_top_k(routing_decision: Dict[str, Any], requested_top_k: int) -> int:
+    """
+    Number of chunks to retrieve for a Q&A query routed by /auto.
+    
+    Confident LLM or prototype routes are usually narrow factual questions,
+    so they get at most confident_qa_top_k chunks. Keyword-heuristic routes
+    keep the requested top_k: their fixed confidence only says a question
+    word matched, not how broad the question is.
+    """
+    if routing_decision.get('reasoning') == 'heuristic':
+        return requested_top_k
+    if routing_decision.get('confidence', 0.0) >= settings.confident_qa_threshold:
+        return min(requested_top_k, settings.confident_qa_top_k)
+    return requested_top_k
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(vector_store: VectorStore = Depends(get_vector_store)):
     """Health check endpoint."""
     try:
-        stats = vector_store.get_collection_stats()
+        stats = await asyncio.to_thread(vector_store.get_collection_stats)
         return HealthResponse(
             status="healthy",
             vector_store=stats,
             embedding_model=settings.embedding_model,
-            generation_model=settings.generation_model
+            generation_model=settings.generation_model,
+            llm_cache=get_llm_cache().stats()
         )
     except Exception as e:
         raise HTTPException(
@@ -132,7 +265,12 @@ async def health_check():
 
 
 @router.post("/qa", response_model=QAResponse)
-async def question_answering(request: QARequest):
+async def question_answering(
+    request: QARequest,
+    embedder: BatchedEmbedder = Depends(get_batched_embedder),
+    vector_store: VectorStore = Depends(get_vector_store),
+    qa_agent: QAAgent = Depends(get_qa_agent)
+):
     """
     Answer questions about the market research document.
     
@@ -140,30 +278,37 @@ async def question_answering(request: QARequest):
     """
     try:
         # Generate query embedding
-        query_embedding = embedder.embed_query(request.question)
+        query_embedding = await embedder.submit(request.question)
         
-        # Retrieve relevant chunks
-        results = vector_store.query(
-            query_embedding=query_embedding,
-            top_k=request.top_k
-        )
+        # Reuse the answer to a near-duplicate question if one is cached
+        answer_result = qa_agent.get_cached_answer(query_embedding, request.top_k)
         
-        if not results['documents']:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No relevant information found"
+        if answer_result is None:
+            # Retrieve relevant chunks
+            results = await asyncio.to_thread(
+                vector_store.query,
+                query_embedding=query_embedding,
+                top_k=request.top_k
+            )
+            
+            if not results['documents']:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No relevant information found"
+                )
+            
+            # Generate answer
+            answer_result = await _select_qa_agent(results['metadatas']).aanswer_question(
+                question=request.question,
+                context_chunks=results['documents'],
+                metadata=results['metadatas'],
+                query_embedding=query_embedding,
+                top_k=request.top_k
             )
-        
-        # Generate answer
-        answer_result = qa_agent.answer_question(
-            question=request.question,
-            context_chunks=results['documents'],
-            metadata=results['metadatas']
-        )
         
         # Format metadata
         source_metadata = [
-            SourceMetadata(**meta) for meta in results['metadatas']
+            SourceMetadata(**meta) for meta in answer_result['source_metadata']
         ]
         
         return QAResponse(
@@ -184,8 +329,90 @@ async def question_answering(request: QARequest):
         )
 
 
+def _sse(payload: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {orjson.dumps(payload).decode()}\n\n"
+
+
+@router.post("/qa/stream")
+async def question_answering_stream(
+    request: QARequest,
+    embedder: BatchedEmbedder = Depends(get_batched_embedder),
+    vector_store: VectorStore = Depends(get_vector_store),
+    qa_agent: QAAgent = Depends(get_qa_agent)
+):
+    """
+    Answer a question, streaming the answer as Server-Sent Events.
+    
+    Emits `data: {"text": ...}` frames as the answer is generated, then an
+    `event: done` frame with sources, source_metadata and confidence.
+    Errors raised after streaming starts are sent as an `event: error` frame.
+    """
+    try:
+        query_embedding = await embedder.submit(request.question)
+        cached_result = qa_agent.get_cached_answer(query_embedding, request.top_k)
+        
+        if cached_result is None:
+            results = await asyncio.to_thread(
+                vector_store.query,
+                query_embedding=query_embedding,
+                top_k=request.top_k
+            )
+            
+            if not results['documents']:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No relevant information found"
+                )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in streaming Q&A: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing question: {str(e)}"
+        )
+    
+    def event_stream():
+        if cached_result is not None:
+            events = [
+                {'type': 'chunk', 'text': cached_result['answer']},
+                {'type': 'done', **cached_result}
+            ]
+        else:
+            events = _select_qa_agent(results['metadatas']).answer_stream(
+                question=request.question,
+                context_chunks=results['documents'],
+                metadata=results['metadatas'],
+                query_embedding=query_embedding,
+                top_k=request.top_k
+            )
+        
+        try:
+            for event in events:
+                if event['type'] == 'chunk':
+                    yield _sse({'text': event['text']})
+                else:
+                    yield _sse({
+                        'sources': event['sources'],
+                        'source_metadata': event['source_metadata'],
+                        'confidence': event['confidence']
+                    }, event='done')
+        except Exception as e:
+            logger.error(f"Error in streaming Q&A: {e}")
+            yield _sse({'detail': f"Error processing question: {str(e)}"}, event='error')
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/summarize", response_model=SummaryResponse)
-async def summarize_document(request: SummarizeRequest):
+async def summarize_document(
+    request: SummarizeRequest,
+    summarizer_agent: SummarizerAgent = Depends(get_summarizer_agent),
+    document_text: str = Depends(get_document_text)
+):
     """
     Generate a summary of the market research document.
     
@@ -196,7 +423,8 @@ async def summarize_document(request: SummarizeRequest):
     """
     try:
         # Generate summary
-        summary_result = summarizer_agent.summarize(
+        summary_result = await asyncio.to_thread(
+            summarizer_agent.summarize,
             document_text=document_text,
             summary_type=request.summary_type,
             max_words=request.max_words
@@ -212,8 +440,47 @@ async def summarize_document(request: SummarizeRequest):
         )
 
 
+@router.post("/summarize/stream")
+async def summarize_document_stream(
+    request: SummarizeRequest,
+    summarizer_agent: SummarizerAgent = Depends(get_summarizer_agent),
+    document_text: str = Depends(get_document_text)
+):
+    """
+    Generate a summary, streaming it as Server-Sent Events.
+    
+    Emits `data: {"text": ...}` frames as the summary is generated, then an
+    `event: done` frame with summary_type, word_count and requested_max_words.
+    Errors are sent as an `event: error` frame.
+    """
+    def event_stream():
+        try:
+            for event in summarizer_agent.summarize_stream(
+                document_text=document_text,
+                summary_type=request.summary_type,
+                max_words=request.max_words
+            ):
+                if event['type'] == 'chunk':
+                    yield _sse({'text': event['text']})
+                else:
+                    yield _sse({
+                        'summary_type': event['summary_type'],
+                        'word_count': event['word_count'],
+                        'requested_max_words': event['requested_max_words']
+                    }, event='done')
+        except Exception as e:
+            logger.error(f"Error in streaming summarization: {e}")
+            yield _sse({'detail': f"Error generating summary: {str(e)}"}, event='error')
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/extract", response_model=ExtractionResponse)
-async def extract_data(request: ExtractRequest):
+async def extract_data(
+    request: ExtractRequest,
+    extractor_agent: ExtractorAgent = Depends(get_extractor_agent),
+    document_text: str = Depends(get_document_text)
+):
     """
     Extract structured data from the document as JSON.
     
@@ -223,7 +490,8 @@ async def extract_data(request: ExtractRequest):
     try:
         if request.custom_schema:
             # Use custom schema extraction
-            extracted = extractor_agent.extract_custom_fields(
+            extracted = await asyncio.to_thread(
+                extractor_agent.extract_custom_fields,
                 document_text=document_text,
                 field_schema=request.custom_schema
             )
@@ -234,8 +502,8 @@ async def extract_data(request: ExtractRequest):
             )
         else:
             # Use default extraction
-            extraction_result = extractor_agent.extract_structured_data(
-                document_text=document_text
+            extraction_result = await extractor_agent.aextract_structured_data(
+                document_text=await asyncio.to_thread(get_extraction_context)
             )
             return ExtractionResponse(**extraction_result)
     
@@ -248,7 +516,16 @@ async def extract_data(request: ExtractRequest):
 
 
 @router.post("/auto", response_model=AutoQueryResponse)
-async def auto_query(request: AutoQueryRequest):
+async def auto_query(
+    request: AutoQueryRequest,
+    embedder: BatchedEmbedder = Depends(get_batched_embedder),
+    vector_store: VectorStore = Depends(get_vector_store),
+    qa_agent: QAAgent = Depends(get_qa_agent),
+    summarizer_agent: SummarizerAgent = Depends(get_summarizer_agent),
+    extractor_agent: ExtractorAgent = Depends(get_extractor_agent),
+    router_agent: RouterAgent = Depends(get_router_agent),
+    document_text: str = Depends(get_document_text)
+):
     """
     Autonomous query routing (Bonus Feature 1).
     
@@ -256,36 +533,58 @@ async def auto_query(request: AutoQueryRequest):
     is most appropriate for your query based on the natural language input.
     """
     try:
-        # Route the query
-        routing_decision = router_agent.route(request.query)
+        # Route the query, speculatively embedding it for Q&A at the same time.
+        # The router reuses the same embedding for its cache if it needs one.
+        embed_task = asyncio.create_task(embedder.submit(request.query))
+        try:
+            routing_decision = await router_agent.aroute(request.query, embed_task)
+        except BaseException:
+            embed_task.cancel()
+            raise
         
         # Execute the selected tool
         tool = routing_decision['tool']
         
+        if tool != 'qa':
+            embed_task.cancel()
+        
         if tool == 'qa':
             # Execute Q&A
-            query_embedding = embedder.embed_query(request.query)
-            results = vector_store.query(
-                query_embedding=query_embedding,
-                top_k=request.top_k
-            )
+            query_embedding = await embed_task
+            top_k = _auto_qa_top_k(routing_decision, request.top_k)
+            result = qa_agent.get_cached_answer(query_embedding, top_k)
             
-            if not results['documents']:
-                result = {
-                    'answer': "No relevant information found",
-                    'sources': [],
-                    'confidence': 0.0
-                }
-            else:
-                result = qa_agent.answer_question(
-                    question=request.query,
-                    context_chunks=results['documents'],
-                    metadata=results['metadatas']
+            if result is None:
+                results = await asyncio.to_thread(
+                    vector_store.query,
+                    query_embedding=query_embedding,
+                    top_k=top_k
+                )
+                
+                logger.info(
+                    f"Auto Q&A: top_k={top_k}, ~"
+                    f"{sum(len(chunk) for chunk in results['documents']) // 4} context tokens"
                 )
+                
+                if not results['documents']:
+                    result = {
+                        'answer': "No relevant information found",
+                        'sources': [],
+                        'confidence': 0.0
+                    }
+                else:
+                    result = await _select_qa_agent(results['metadatas']).aanswer_question(
+                        question=request.query,
+                        context_chunks=results['documents'],
+                        metadata=results['metadatas'],
+                        query_embedding=query_embedding,
+                        top_k=top_k
+                    )
         
         elif tool == 'summarize':
             # Execute summarization
-            result = summarizer_agent.summarize(
+            result = await asyncio.to_thread(
+                summarizer_agent.summarize,
                 document_text=document_text,
                 summary_type="comprehensive",
                 max_words=200
@@ -293,8 +592,8 @@ async def auto_query(request: AutoQueryRequest):
         
         elif tool == 'extract':
             # Execute extraction
-            result = extractor_agent.extract_structured_data(
-                document_text=document_text
+            result = await extractor_agent.aextract_structured_data(
+                document_text=await asyncio.to_thread(get_extraction_context)
             )
         
         else:
@@ -107,6 +107,7 @@ class HealthResponse(BaseModel):
     vector_store: Dict[str, Any]
     embedding_model: str
     generation_model: str
+    llm_cache: Optional[Dict[str, Any]] = None
 
 
 class ErrorResponse(BaseModel):
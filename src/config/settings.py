@@ -3,6 +3,7 @@ Configuration management using Pydantic Settings.
 """
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -18,14 +19,48 @@ class Settings(BaseSettings):
     embedding_model: str = Field("models/text-embedding-004", env="EMBEDDING_MODEL")
     generation_model: str = Field("gemini-2.0-flash-exp", env="GENERATION_MODEL")
     temperature: float = Field(0.2, env="TEMPERATURE")
+    qa_model_pool: str = Field("", env="QA_MODEL_POOL")  # Comma-separated; defaults to generation_model
     
     # RAG Parameters
     chunk_size: int = Field(1000, env="CHUNK_SIZE")
     chunk_overlap: int = Field(200, env="CHUNK_OVERLAP")
     top_k_retrieval: int = Field(5, env="TOP_K_RETRIEVAL")
+    confident_qa_top_k: int = Field(2, env="CONFIDENT_QA_TOP_K")  # /auto: chunks when routing is confident
+    confident_qa_threshold: float = Field(0.9, env="CONFIDENT_QA_THRESHOLD")
+    extraction_max_chars: int = Field(8000, env="EXTRACTION_MAX_CHARS")
+    
+    # Query Embedding Batching (coalesce concurrent requests)
+    embed_batch_size: int = Field(32, env="EMBED_BATCH_SIZE")
+    embed_batch_wait_ms: float = Field(25.0, env="EMBED_BATCH_WAIT_MS")
+    query_embedding_cache_size: int = Field(1024, env="QUERY_EMBEDDING_CACHE_SIZE")  # 0 disables
     
     # Vector Store
     vector_store_path: str = Field("./chroma_db", env="VECTOR_STORE_PATH")
+    streaming_ingest: bool = Field(False, env="STREAMING_INGEST")  # Chunk from disk while indexing (large documents)
+    
+    # LLM Response Cache
+    enable_llm_cache: bool = Field(True, env="ENABLE_LLM_CACHE")
+    llm_cache_size: int = Field(512, env="LLM_CACHE_SIZE")
+    llm_cache_ttl: int = Field(14400, env="LLM_CACHE_TTL")
+    redis_url: Optional[str] = Field(None, env="REDIS_URL")
+    
+    # Semantic QA Cache
+    enable_semantic_cache: bool = Field(True, env="ENABLE_SEMANTIC_CACHE")
+    semantic_cache_threshold: float = Field(0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_size: int = Field(1024, env="SEMANTIC_CACHE_SIZE")
+    
+    # Semantic Routing Cache
+    enable_route_cache: bool = Field(True, env="ENABLE_ROUTE_CACHE")
+    route_cache_threshold: float = Field(0.9, env="ROUTE_CACHE_THRESHOLD")
+    
+    # Auto-reload when running `python -m src.main` (disable in production)
+    api_reload: bool = Field(True, env="API_RELOAD")
+    
+    # CORS (comma-separated origins; empty disables the middleware)
+    cors_origins: str = Field("*", env="CORS_ORIGINS")
+    
+    # Answer common queries at startup to fill the caches
+    warm_cache_on_start: bool = Field(False, env="WARM_CACHE_ON_START")
     
     class Config:
         env_file = ".env"
@@ -1,10 +1,31 @@
 """
 Text chunking strategies for optimal retrieval.
 """
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
+# Extra characters searched past the expected chunk start (stripped separators/whitespace)
+_FIND_SLACK = 64
+
+
+@lru_cache(maxsize=32)
+def _get_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Tuple[str, ...]
+) -> RecursiveCharacterTextSplitter:
+    """Return a shared splitter for a configuration (splitters are stateless)."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=list(separators),
+        length_function=len,
+        is_separator_regex=False
+    )
+
+
 class DocumentChunker:
     """
     Intelligent document chunking for RAG applications.
@@ -53,12 +74,11 @@ class DocumentChunker:
             ""       # Characters (fallback)
         ]
         
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=self.separators,
-            length_function=len,
-            is_separator_regex=False
+        # Chunkers with the same configuration share one splitter
+        self.splitter = _get_splitter(
+            self.chunk_size,
+            self.chunk_overlap,
+            tuple(self.separators)
         )
     
     def chunk_document(self, text: str) -> List[Dict[str, any]]:
@@ -75,16 +95,24 @@ class DocumentChunker:
             - start_char: Starting character position
             - end_char: Ending character position
         """
-        # Split text into chunks
-        chunks = self.splitter.split_text(text)
+        # Split text into chunks (paragraph fast path, full recursion if needed)
+        chunks = self._fast_paragraph_split(text)
+        if chunks is None:
+            chunks = self.splitter.split_text(text)
         
         # Add metadata to each chunk
         chunked_docs = []
         current_position = 0
         
         for idx, chunk in enumerate(chunks):
-            # Find actual position in original text (accounting for overlap)
-            chunk_position = text.find(chunk, current_position)
+            # Find actual position in original text (accounting for overlap).
+            # The next chunk starts within chunk_overlap (plus any stripped
+            # separator) of the cursor, so search a bounded window first and
+            # only scan the rest of the text if that misses.
+            window_end = current_position + self.chunk_overlap + len(chunk) + _FIND_SLACK
+            chunk_position = text.find(chunk, current_position, window_end)
+            if chunk_position == -1:
+                chunk_position = text.find(chunk, current_position)
             
             chunk_metadata = {
                 'text': chunk,
@@ -102,6 +130,134 @@ class DocumentChunker:
         
         return chunked_docs
     
+    def iter_chunks(self, source: Union[str, Iterable[str]]) -> Iterator[Dict[str, any]]:
+        """
+        Yield chunks one at a time from a text or a stream of text pieces.
+        
+        For documents too large to hold as a chunk list; pair it with
+        DocumentLoader.load_text_file_iter to avoid loading the file at all.
+        Each boundary is the last occurrence of the highest-priority
+        separator within chunk_size of the chunk start, and the next chunk
+        starts chunk_overlap characters before it (moved forward to a word
+        start). Boundaries can differ slightly from chunk_document, which
+        uses the recursive splitter.
+        
+        Args:
+            source: The full document text, or consecutive pieces of it
+            
+        Yields:
+            Chunk dictionaries with the same fields as chunk_document
+        """
+        pieces = [source] if isinstance(source, str) else source
+        
+        buffer = ""
+        offset = 0  # Document position of buffer[0]
+        cursor = 0  # Start of the next chunk within buffer
+        idx = 0
+        
+        for piece in pieces:
+            # Drop consumed text so the buffer stays around one piece long
+            buffer = buffer[cursor:] + piece
+            offset += cursor
+            cursor = 0
+            
+            # Only cut while a full window is buffered, so later pieces
+            # cannot change where a boundary falls
+            while len(buffer) - cursor > self.chunk_size:
+                end = self._find_boundary(buffer, cursor)
+                chunk = self._make_chunk(buffer, cursor, end, offset, idx)
+                if chunk is not None:
+                    yield chunk
+                    idx += 1
+                
+                next_start = end - self.chunk_overlap
+                if next_start <= cursor:
+                    next_start = end
+                else:
+                    space = buffer.find(" ", next_start, end)
+                    if space != -1:
+                        next_start = space + 1
+                cursor = next_start
+        
+        # What is left fits in one chunk
+        chunk = self._make_chunk(buffer, cursor, len(buffer), offset, idx)
+        if chunk is not None:
+            yield chunk
+    
+    def _find_boundary(self, buffer: str, start: int) -> int:
+        """Return the end of the chunk starting at start (exclusive)."""
+        limit = start + self.chunk_size
+        # Cut past the overlap so every chunk adds new text
+        lower = start + min(self.chunk_overlap + 1, self.chunk_size // 2)
+        
+        for separator in self.separators[:-1]:
+            position = buffer.rfind(separator, lower, limit)
+            if position != -1:
+                return position + len(separator)
+        
+        return limit
+    
+    @staticmethod
+    def _make_chunk(
+        buffer: str,
+        start: int,
+        end: int,
+        offset: int,
+        idx: int
+    ) -> Optional[Dict[str, any]]:
+        """Build chunk metadata for buffer[start:end], or None if it is blank."""
+        raw = buffer[start:end]
+        text = raw.strip()
+        if not text:
+            return None
+        
+        start_char = offset + start + len(raw) - len(raw.lstrip())
+        return {
+            'text': text,
+            'chunk_id': f"chunk_{idx}",
+            'chunk_index': idx,
+            'start_char': start_char,
+            'end_char': start_char + len(text),
+            'length': len(text)
+        }
+    
+    def _fast_paragraph_split(self, text: str) -> Optional[List[str]]:
+        """
+        Split on paragraph breaks without the recursive splitter.
+        
+        When every paragraph fits in a chunk, the recursive splitter only
+        splits on "\\n\\n" and packs the pieces, so doing that split with
+        str.split and handing the pieces to the splitter's own merge step gives
+        identical chunks (same packing and overlap) without the regex pass.
+        
+        Args:
+            text: The full document text
+            
+        Returns:
+            List of chunk strings, or None if the text has no paragraph breaks
+            or a paragraph is too long and needs the lower-priority separators
+        """
+        if "\n\n" not in text:
+            return None
+        
+        paragraphs = text.split("\n\n")
+        
+        if self.splitter._keep_separator:
+            # Separator stays attached to the start of the following paragraph
+            splits = [paragraphs[0]] + ["\n\n" + p for p in paragraphs[1:]]
+            merge_separator = ""
+        else:
+            splits = paragraphs
+            merge_separator = "\n\n"
+        
+        splits = [s for s in splits if s]
+        
+        # Same condition the splitter uses before recursing into a piece
+        if any(len(s) >= self.chunk_size for s in splits):
+            return None
+        
+        return self.splitter._merge_splits(splits, merge_separator)
+    
     def get_chunk_statistics(self, chunks: List[Dict[str, any]]) -> Dict[str, any]:
         """
         Calculate statistics about the chunking process.
@@ -121,13 +277,22 @@ class DocumentChunker:
                 'total_characters': 0
             }
         
-        chunk_sizes = [chunk['length'] for chunk in chunks]
+        # Single pass for total, min and max
+        total = 0
+        min_size = max_size = chunks[0]['length']
+        for chunk in chunks:
+            size = chunk['length']
+            total += size
+            if size < min_size:
+                min_size = size
+            elif size > max_size:
+                max_size = size
         
         return {
             'total_chunks': len(chunks),
-            'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes),
-            'min_chunk_size': min(chunk_sizes),
-            'max_chunk_size': max(chunk_sizes),
-            'total_characters': sum(chunk_sizes),
+            'avg_chunk_size': total / len(chunks),
+            'min_chunk_size': min_size,
+            'max_chunk_size': max_size,
+            'total_characters': total,
             'overlap_ratio': self.chunk_overlap / self.chunk_size
         }
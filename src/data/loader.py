@@ -2,6 +2,28 @@
 Document loading utilities.
 """
 from pathlib import Path
+from typing import Iterator, Optional
+import codecs
+import io
+import mmap
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # Encoding detection is optional; latin-1 is the fallback
+    from_bytes = None
+
+
+# Byte-order marks, longest first (the UTF-32 LE BOM starts with the UTF-16 LE one)
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Bytes sampled for encoding detection when a file is not valid UTF-8
+_DETECT_SAMPLE_BYTES = 64 * 1024
 
 
 class DocumentLoader:
@@ -27,15 +49,123 @@ class DocumentLoader:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return content
-        except UnicodeDecodeError:
-            # Try with a different encoding if UTF-8 fails
-            with open(path, 'r', encoding='latin-1') as f:
-                content = f.read()
-            return content
+        if path.stat().st_size == 0:
+            return ""
+        
+        # Map the file and decode straight from the mapping: one copy into
+        # the str, and the latin-1 fallback reuses the bytes instead of
+        # reading the file again.
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            encoding = DocumentLoader._encoding_from_bom(mm[:4]) or 'utf-8'
+            try:
+                content = str(mm, encoding)
+            except UnicodeDecodeError:
+                # Detect the encoding from a sample rather than guessing
+                encoding = DocumentLoader._detect_encoding(mm[:_DETECT_SAMPLE_BYTES])
+                try:
+                    content = str(mm, encoding)
+                except (UnicodeDecodeError, LookupError):
+                    content = str(mm, 'latin-1')
+        
+        # Match text-mode reads (universal newlines)
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        
+        return content
+    
+    @staticmethod
+    def _encoding_from_bom(head: bytes) -> Optional[str]:
+        """Return the encoding indicated by a byte-order mark, if any."""
+        for bom, encoding in _BOMS:
+            if head.startswith(bom):
+                return encoding
+        return None
+    
+    @staticmethod
+    def _detect_encoding(sample: bytes) -> str:
+        """Guess the encoding of a non-UTF-8 sample (latin-1 if unknown)."""
+        if from_bytes is not None:
+            best = from_bytes(sample).best()
+            if best is not None:
+                return best.encoding
+        return 'latin-1'
+    
+    @staticmethod
+    def load_text_file_iter(
+        file_path: str,
+        chunk_bytes: int = 4 << 20,
+        encoding: str = 'utf-8'
+    ) -> Iterator[str]:
+        """
+        Load a text file incrementally, yielding decoded pieces.
+        
+        Peak memory stays around chunk_bytes regardless of file size.
+        Multi-byte characters split across reads are handled by an
+        incremental decoder. As in load_text_file, a byte-order mark selects
+        the encoding and is dropped, and newlines are normalized to "\n"
+        (a "\r\n" split across two reads is still one newline).
+        
+        Without a byte-order mark, the first read (at least the same sample
+        load_text_file uses) decides the encoding: the given encoding if it
+        decodes, otherwise the detected one, otherwise latin-1. Bytes later
+        in the file that don't decode are replaced with U+FFFD rather than
+        failing mid-stream.
+        
+        Args:
+            file_path: Path to the text file
+            chunk_bytes: Bytes read per piece (default 4 MB)
+            encoding: Preferred text encoding when the file has no byte-order mark
+            
+        Yields:
+            Consecutive pieces of the decoded text
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        path = Path(file_path)
+        
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        with open(path, 'rb') as f:
+            first_read = max(chunk_bytes, _DETECT_SAMPLE_BYTES)
+            data = f.read(first_read)
+            encoding = (
+                DocumentLoader._encoding_from_bom(data[:4])
+                or DocumentLoader._stream_encoding(data, len(data) < first_read, encoding)
+            )
+            
+            # Universal newlines; a trailing '\r' is held back until the next
+            # read shows whether a '\n' follows
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(errors='replace'),
+                translate=True
+            )
+            
+            while True:
+                text = decoder.decode(data, final=not data)
+                if text:
+                    yield text
+                if not data:
+                    break
+                data = f.read(chunk_bytes)
+    
+    @staticmethod
+    def _stream_encoding(head: bytes, is_whole_file: bool, preferred: str) -> str:
+        """
+        Pick the encoding for a streamed file from its first read.
+        
+        Same order as load_text_file: the preferred encoding, then the one
+        detected from the first _DETECT_SAMPLE_BYTES, then latin-1.
+        """
+        for candidate in (preferred, DocumentLoader._detect_encoding(head[:_DETECT_SAMPLE_BYTES])):
+            try:
+                # Incremental so a multi-byte character cut off by the read is not an error
+                codecs.getincrementaldecoder(candidate)().decode(head, final=is_whole_file)
+                return candidate
+            except (UnicodeDecodeError, LookupError):
+                continue
+        return 'latin-1'
     
     @staticmethod
     def load_document(file_path: str) -> str:
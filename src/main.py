@@ -3,10 +3,12 @@ Main FastAPI application for AI Market Analyst Agent.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from importlib.util import find_spec
 import logging
 import uvicorn
 
-from .api import router, initialize_components
+from .api import router, initialize_components, shutdown_components, warm_caches
 from .config import settings
 
 # Configure logging
@@ -22,17 +24,21 @@ app = FastAPI(
     description="Multi-functional AI agent for market research analysis using RAG",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware (CORS_ORIGINS="" leaves CORS to the reverse proxy)
+cors_origins = [origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()]
+if cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,  # In production, specify actual origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        max_age=86400,  # Browsers reuse the preflight response for a day
+    )
 
 # Include API router
 app.include_router(router)
@@ -44,12 +50,21 @@ async def startup_event():
     logger.info("Starting AI Market Analyst Agent...")
     try:
         initialize_components()
+        if settings.warm_cache_on_start:
+            warm_caches()
         logger.info("Startup completed successfully")
     except Exception as e:
         logger.error(f"Startup failed: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers on shutdown."""
+    logger.info("Shutting down AI Market Analyst Agent...")
+    await shutdown_components()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -60,7 +75,9 @@ async def root():
         "endpoints": {
             "health": "/api/v1/health",
             "qa": "/api/v1/qa",
+            "qa_stream": "/api/v1/qa/stream",
             "summarize": "/api/v1/summarize",
+            "summarize_stream": "/api/v1/summarize/stream",
             "extract": "/api/v1/extract",
             "auto": "/api/v1/auto (Bonus: Autonomous Routing)"
         },
@@ -70,9 +87,13 @@ async def root():
 
 
 if __name__ == "__main__":
+    # Use uvloop and httptools (installed by uvicorn[standard]) when present;
+    # uvloop is not available on Windows, so fall back to asyncio/h11 there
     uvicorn.run(
         "src.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=settings.api_reload,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11"
     )
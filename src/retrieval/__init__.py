@@ -1,5 +1,7 @@
 """Retrieval package initialization."""
 from .embedder import GeminiEmbedder
 from .vectorstore import VectorStore
+from .semantic_cache import SemanticCache
+from .batched_embedder import BatchedEmbedder
 
-__all__ = ['GeminiEmbedder', 'VectorStore']
+__all__ = ['GeminiEmbedder', 'VectorStore', 'SemanticCache', 'BatchedEmbedder']
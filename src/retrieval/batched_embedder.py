@@ -0,0 +1,132 @@
+"""
+Micro-batching wrapper for query embeddings.
+"""
+from typing import List, Optional, Tuple
+import asyncio
+import contextlib
+import logging
+
+from .embedder import GeminiEmbedder
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedEmbedder:
+    """
+    Coalesce concurrent query embeddings into batched API calls.
+
+    Design Decision: Short collection window in front of embed_queries
+
+    Rationale:
+    1. Why batch:
+       - Every /qa and /auto request embeds its query first
+       - Under load, many of those calls are in flight at once
+       - One batched call costs about the same as a single one
+
+    2. Window:
+       - The first queued query opens a window of max_wait_ms
+       - The batch is sent when the window closes or max_batch_size is reached
+       - An idle server adds at most max_wait_ms to a lone request
+
+    3. Failure Handling:
+       - A failed batch call fails every request in that batch
+       - So does a result whose length does not match the batch
+       - The worker keeps running for later batches
+       - aclose() stops the worker and fails queries still waiting
+    """
+
+    def __init__(
+        self,
+        embedder: GeminiEmbedder,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 25.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedder: Embedder used for the batched calls
+            max_batch_size: Maximum number of queries per API call
+            max_wait_ms: Longest time a query waits for others to join its batch
+        """
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, query: str) -> List[float]:
+        """
+        Embed a query as part of the next batch.
+
+        Args:
+            query: Query text to embed
+
+        Returns:
+            Embedding vector as list of floats
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def aclose(self) -> None:
+        """Stop the worker and fail any queries still waiting for a batch."""
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+        closed = RuntimeError("Query embedding batcher is closed")
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(closed)
+
+    async def _run(self) -> None:
+        """Collect queued queries into batches and embed them."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                queries = [query for query, _ in batch]
+                embeddings = await asyncio.to_thread(self.embedder.embed_queries, queries)
+                if len(embeddings) != len(batch):
+                    raise RuntimeError(
+                        f"Embedder returned {len(embeddings)} embeddings for {len(batch)} queries"
+                    )
+
+                for (_, future), embedding in zip(batch, embeddings):
+                    if not future.done():
+                        future.set_result(embedding)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Query embedding batcher is closed"))
+                raise
+            except Exception as e:
+                logger.warning(f"Batched embedding of {len(batch)} queries failed: {e}")
+                self._fail(batch, e)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]], error: BaseException) -> None:
+        """Resolve every still-pending future in a batch with an error."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
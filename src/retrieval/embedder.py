@@ -2,10 +2,33 @@
 Embedding generation using Google Gemini.
 """
 import google.generativeai as genai
-from typing import List
+from google.api_core import exceptions as google_exceptions
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import math
+import threading
+import time
 import numpy as np
 
 
+logger = logging.getLogger(__name__)
+
+
+def _normalize_array(vectors: list) -> np.ndarray:
+    """L2-normalize embedding vectors so cosine similarity is a dot product."""
+    arr = np.asarray(vectors, dtype=np.float32)
+    arr /= np.linalg.norm(arr, axis=-1, keepdims=True) + 1e-12
+    return arr
+
+
+def _normalize_rows(vectors: list) -> list:
+    """L2-normalize embedding vectors and return them as Python lists."""
+    return _normalize_array(vectors).tolist()
+
+
 class GeminiEmbedder:
     """
     Generate embeddings using Google's Gemini embedding model.
@@ -26,23 +49,50 @@ class GeminiEmbedder:
        - Cohere: Also paid, though good quality
        - Gemini: Free, cloud-based, excellent quality
     
-    3. Batch Processing:
-       - Process multiple texts at once for efficiency
-       - Reduces API calls and latency
-       - Built-in rate limiting handling
+    3. Unit-Length Vectors:
+       - Every embedding is L2-normalized before it is returned
+       - Cosine similarity becomes a plain inner product
+       - The vector store indexes with "ip" space accordingly
+    
+    4. Batch Processing:
+       - Up to 100 texts per embed_content call (the API's batch limit)
+       - Batches are sent from a small thread pool (I/O-bound calls)
+       - Rate-limit (429) errors are retried with exponential backoff
+    
+    5. Query Cache:
+       - Query embeddings are kept in an LRU keyed by query text
+       - Repeated questions (retries, health checks, UI reruns) skip the API
+       - Stored as tuples and copied out, so callers cannot mutate entries
     """
     
-    def __init__(self, api_key: str, model_name: str = "models/text-embedding-004"):
+    BATCH_SIZE = 100  # Gemini API batch limit
+    MAX_WORKERS = 4
+    MAX_RETRIES = 3
+    
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "models/text-embedding-004",
+        query_cache_size: int = 1024
+    ):
         """
         Initialize the embedder.
         
         Args:
             api_key: Google Gemini API key
             model_name: Name of the embedding model to use
+            query_cache_size: Maximum number of cached query embeddings
+                (0 disables the cache)
         """
-        genai.configure(api_key=api_key)
+        # Imported here: the agents package imports retrieval at module load
+        from ..agents._gemini import ensure_configured
+        ensure_configured(api_key)
         self.model_name = model_name
         self.embedding_dim = 768  # text-embedding-004 dimension
+        self.query_cache_size = query_cache_size
+        
+        self._query_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
     
     def embed_text(self, text: str) -> List[float]:
         """
@@ -59,7 +109,7 @@ class GeminiEmbedder:
             content=text,
             task_type="retrieval_document"
         )
-        return result['embedding']
+        return _normalize_rows(result['embedding'])
     
     def embed_query(self, query: str) -> List[float]:
         """
@@ -73,36 +123,125 @@ class GeminiEmbedder:
         Returns:
             Embedding vector as list of floats
         """
+        cached = self._get_cached_query(query)
+        if cached is not None:
+            return cached
+        
         result = genai.embed_content(
             model=self.model_name,
             content=query,
             task_type="retrieval_query"
         )
-        return result['embedding']
+        embedding = _normalize_rows(result['embedding'])
+        self._cache_query(query, embedding)
+        return embedding
     
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
         """
-        Generate embeddings for multiple texts.
+        Generate embeddings for several queries in one API call.
+        
+        Only queries missing from the query cache are sent to the API.
         
         Args:
-            texts: List of texts to embed
+            queries: Query texts to embed
             
         Returns:
-            List of embedding vectors
+            List of unit-length embedding vectors, in input order
         """
-        embeddings = []
+        embeddings = [self._get_cached_query(query) for query in queries]
+        missing = list(dict.fromkeys(
+            query for query, embedding in zip(queries, embeddings) if embedding is None
+        ))
+        
+        if missing:
+            result = genai.embed_content(
+                model=self.model_name,
+                content=missing,
+                task_type="retrieval_query"
+            )
+            fetched = dict(zip(missing, _normalize_rows(result['embedding'])))
+            for query, embedding in fetched.items():
+                self._cache_query(query, embedding)
+            embeddings = [
+                embedding if embedding is not None else list(fetched[query])
+                for query, embedding in zip(queries, embeddings)
+            ]
         
-        # Process in batches to avoid rate limits
-        batch_size = 100  # Gemini API batch limit
+        return embeddings
+    
+    def _get_cached_query(self, query: str) -> Optional[List[float]]:
+        """Return a copy of a cached query embedding, or None on a miss."""
+        with self._query_cache_lock:
+            cached = self._query_cache.get(query)
+            if cached is None:
+                return None
+            self._query_cache.move_to_end(query)
+        return list(cached)
+    
+    def _cache_query(self, query: str, embedding: List[float]) -> None:
+        """Store a query embedding, evicting the least recently used entry if full."""
+        if self.query_cache_size <= 0:
+            return
+        with self._query_cache_lock:
+            self._query_cache[query] = tuple(embedding)
+            self._query_cache.move_to_end(query)
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Async variant of embed_query, run in a worker thread.
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        Args:
+            query: Query text to embed
             
-            for text in batch:
-                embedding = self.embed_text(text)
-                embeddings.append(embedding)
+        Returns:
+            Embedding vector as list of floats
+        """
+        return await asyncio.to_thread(self.embed_query, query)
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts.
         
-        return embeddings
+        The result stays a contiguous float32 array (no per-value Python
+        floats); VectorStore.add_documents accepts it as is.
+        
+        Args:
+            texts: List of texts to embed
+            
+        Returns:
+            (N, D) float32 array of unit-length embeddings, in input order
+        """
+        batches = [
+            texts[i:i + self.BATCH_SIZE]
+            for i in range(0, len(texts), self.BATCH_SIZE)
+        ]
+        
+        if not batches:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        if len(batches) == 1:
+            return self._embed_documents(batches[0])
+        
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(batches))) as pool:
+            return np.concatenate(list(pool.map(self._embed_documents, batches)))
+    
+    def _embed_documents(self, batch: List[str]) -> np.ndarray:
+        """Embed one batch of documents in a single call, retrying on rate limits."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                result = genai.embed_content(
+                    model=self.model_name,
+                    content=batch,
+                    task_type="retrieval_document"
+                )
+                return _normalize_array(result['embedding'])
+            except google_exceptions.ResourceExhausted:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Embedding rate limited, retrying in {delay}s")
+                time.sleep(delay)
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
@@ -115,14 +254,40 @@ class GeminiEmbedder:
         Returns:
             Cosine similarity score (0 to 1)
         """
-        vec1_np = np.array(vec1)
-        vec2_np = np.array(vec2)
-        
-        dot_product = np.dot(vec1_np, vec2_np)
-        norm1 = np.linalg.norm(vec1_np)
-        norm2 = np.linalg.norm(vec2_np)
+        v1 = np.asarray(vec1, dtype=np.float32)
+        v2 = np.asarray(vec2, dtype=np.float32)
         
-        if norm1 == 0 or norm2 == 0:
+        # Squared norms as dot products; one sqrt of their product
+        norms = math.sqrt(float(np.einsum('i,i->', v1, v1)) * float(np.einsum('i,i->', v2, v2)))
+        if norms == 0:
             return 0.0
         
-        return float(dot_product / (norm1 * norm2))
+        return float(np.einsum('i,i->', v1, v2)) / norms
+    
+    @staticmethod
+    def cosine_similarity_batch(
+        query: List[float],
+        matrix: np.ndarray,
+        row_norms: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Calculate cosine similarity between a query and many vectors at once.
+        
+        One matrix-vector product replaces a Python-level call per candidate.
+        
+        Args:
+            query: Query vector
+            matrix: Candidate vectors as a (K, D) array (float32 recommended)
+            row_norms: Optional precomputed L2 norms of the matrix rows;
+                pass them when scoring the same matrix repeatedly
+            
+        Returns:
+            Array of K cosine similarity scores
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        q_vec = np.asarray(query, dtype=np.float32)
+        
+        if row_norms is None:
+            row_norms = np.linalg.norm(matrix, axis=1)
+        
+        return (matrix @ q_vec) / (row_norms * np.linalg.norm(q_vec) + 1e-12)
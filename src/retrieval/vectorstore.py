@@ -3,10 +3,22 @@ Vector store using ChromaDB.
 """
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+import threading
 import uuid
+import numpy as np
 
 
+# Collection settings: inner-product distance (GeminiEmbedder returns unit
+# vectors, so it ranks exactly like cosine without per-pair norms) and HNSW
+# parameters sized for a corpus of up to ~100k chunks
+COLLECTION_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 50
+}
+
 class VectorStore:
     """
     Vector database for document storage and retrieval.
@@ -37,60 +49,115 @@ class VectorStore:
        - Active development and community
     """
     
-    def __init__(self, persist_directory: str = "./chroma_db", collection_name: str = "market_research"):
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        collection_name: str = "market_research",
+        flush_every: int = 2048
+    ):
         """
         Initialize the vector store.
         
         Args:
             persist_directory: Directory to persist the database
             collection_name: Name of the collection to use
+            flush_every: Number of buffered chunks that triggers a write to
+                the collection (1 writes on every add_documents call)
         """
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.flush_every = flush_every
         
-        # Initialize ChromaDB client with persistence
-        self.client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False
-        ))
+        # Chunks buffered by add_documents until the next flush
+        self._pending_ids: List[str] = []
+        self._pending_embeddings: List[np.ndarray] = []
+        self._pending_documents: List[str] = []
+        self._pending_metadatas: List[Dict] = []
+        self._pending_lock = threading.Lock()
+        
+        # Initialize ChromaDB client with on-disk persistence
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
         
-        # Get or create collection
+        # Get or create collection (HNSW parameters apply at creation)
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"}  # Use cosine distance
+            metadata=COLLECTION_METADATA
         )
     
-    def add_documents(self, chunks: List[Dict[str, any]], embeddings: List[List[float]]) -> None:
+    def add_documents(
+        self,
+        chunks: List[Dict[str, any]],
+        embeddings: Union[List[List[float]], np.ndarray]
+    ) -> None:
         """
         Add document chunks with embeddings to the vector store.
         
+        Chunks are buffered and written to the collection in one call once
+        flush_every chunks are pending, so ingesting in small batches does
+        not trigger an index update per batch. Call flush() after the last
+        batch; query() and get_collection_stats() flush automatically.
+        
+        Embeddings are buffered as float32 arrays and converted to the lists
+        Chroma expects once per flush.
+        
         Args:
             chunks: List of chunk dictionaries with text and metadata
-            embeddings: List of embedding vectors
+            embeddings: Embedding vectors, as a list or an (N, D) array
         """
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
+        if not chunks:
+            return
         
-        # Prepare data for ChromaDB
-        ids = [chunk.get('chunk_id', str(uuid.uuid4())) for chunk in chunks]
-        documents = [chunk['text'] for chunk in chunks]
-        metadatas = [
-            {
-                'chunk_index': chunk.get('chunk_index', i),
-                'start_char': chunk.get('start_char', 0),
-                'end_char': chunk.get('end_char', 0),
-                'length': chunk.get('length', len(chunk['text']))
-            }
-            for i, chunk in enumerate(chunks)
-        ]
-        
-        # Add to collection
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas
-        )
+        # Prepare data for ChromaDB in one pass over the chunks
+        ids = []
+        documents = []
+        metadatas = []
+        for i, chunk in enumerate(chunks):
+            get = chunk.get
+            text = chunk['text']
+            ids.append(get('chunk_id') or str(uuid.uuid4()))
+            documents.append(text)
+            metadatas.append({
+                'chunk_index': get('chunk_index', i),
+                'start_char': get('start_char', 0),
+                'end_char': get('end_char', 0),
+                # DocumentChunker always sets length; len() covers other callers
+                'length': get('length') or len(text)
+            })
+        
+        with self._pending_lock:
+            self._pending_ids.extend(ids)
+            self._pending_embeddings.append(np.asarray(embeddings, dtype=np.float32))
+            self._pending_documents.extend(documents)
+            self._pending_metadatas.extend(metadatas)
+            should_flush = len(self._pending_ids) >= self.flush_every
+        
+        if should_flush:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write all buffered chunks to the collection in a single add."""
+        with self._pending_lock:
+            if not self._pending_ids:
+                return
+            
+            # Add to collection (Chroma 0.4 validates embeddings as lists of
+            # Python floats, so this is the one place they are converted)
+            self.collection.add(
+                ids=self._pending_ids,
+                embeddings=np.concatenate(self._pending_embeddings).tolist(),
+                documents=self._pending_documents,
+                metadatas=self._pending_metadatas
+            )
+            
+            self._pending_ids = []
+            self._pending_embeddings = []
+            self._pending_documents = []
+            self._pending_metadatas = []
     
     def query(
         self,
@@ -113,6 +180,8 @@ class VectorStore:
             - distances: List of similarity distances
             - ids: List of document IDs
         """
+        self.flush()
+        
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
@@ -133,6 +202,7 @@ class VectorStore:
         Returns:
             Dictionary with collection statistics
         """
+        self.flush()
         count = self.collection.count()
         
         return {
@@ -142,11 +212,17 @@ class VectorStore:
         }
     
     def clear_collection(self) -> None:
-        """Delete all documents from the collection."""
+        """Delete all documents from the collection (including unflushed ones)."""
+        with self._pending_lock:
+            self._pending_ids = []
+            self._pending_embeddings = []
+            self._pending_documents = []
+            self._pending_metadatas = []
+        
         self.client.delete_collection(name=self.collection_name)
         self.collection = self.client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=COLLECTION_METADATA
         )
     
     def delete_collection(self) -> None:
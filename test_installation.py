@@ -4,6 +4,7 @@ Run this before starting the main application.
 """
 import sys
 import os
+import importlib.util
 
 def test_imports():
     """Test if all required packages are installed."""
@@ -19,12 +20,18 @@ def test_imports():
         ('streamlit', 'Streamlit'),
     ]
     
+    def is_installed(package):
+        # find_spec locates the package without running its import-time code
+        try:
+            return importlib.util.find_spec(package) is not None
+        except ImportError:  # Parent package (e.g. "google") is missing
+            return False
+    
     missing = []
     for package, name in required_packages:
-        try:
-            __import__(package)
+        if is_installed(package):
             print(f"✓ {name}")
-        except ImportError:
+        else:
             print(f"✗ {name} - MISSING")
             missing.append(name)
     
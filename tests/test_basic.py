@@ -65,6 +65,77 @@ def test_document_loading():
     assert "Innovate Inc" in content
 
 
+def test_streamed_loading_matches_full_load(tmp_path):
+    """Test that streamed loading handles a BOM and CRLF newlines like load_document."""
+    import codecs
+    from src.data import DocumentLoader, DocumentChunker
+    
+    doc_path = Path(__file__).parent.parent / "data" / "innovate_inc_report.txt"
+    text = DocumentLoader().load_document(str(doc_path))
+    crlf_path = tmp_path / "report.txt"
+    crlf_path.write_bytes(codecs.BOM_UTF8 + text.replace("\n", "\r\n").encode("utf-8"))
+    
+    full = DocumentLoader.load_document(str(crlf_path))
+    # Small odd-sized reads split some "\r\n" pairs across pieces
+    pieces = list(DocumentLoader.load_text_file_iter(str(crlf_path), chunk_bytes=7))
+    
+    assert full == text
+    assert "".join(pieces) == full
+    
+    chunker = DocumentChunker(chunk_size=300, chunk_overlap=50)
+    assert list(chunker.iter_chunks(pieces)) == list(chunker.iter_chunks(full))
+
+
+def test_streamed_loading_non_utf8(tmp_path):
+    """Test that streamed loading falls back like load_text_file for a latin-1 file."""
+    from src.data import DocumentLoader
+    
+    latin1_path = tmp_path / "report.txt"
+    latin1_path.write_bytes(("Café market résumé for Zürich.\n" * 200).encode("latin-1"))
+    
+    full = DocumentLoader.load_text_file(str(latin1_path))
+    pieces = list(DocumentLoader.load_text_file_iter(str(latin1_path), chunk_bytes=7))
+    
+    assert full.startswith("Café market résumé")
+    assert "".join(pieces) == full
+
+
+def test_streaming_ingest_startup(tmp_path, monkeypatch):
+    """Test that startup indexes a non-UTF-8 document with streaming ingest on."""
+    from src.api import dependencies, routes
+    from src.config import settings
+    from src.data import DocumentLoader
+    from src.retrieval import embedder as embedder_module
+    
+    doc_path = tmp_path / "report.txt"
+    doc_path.write_bytes(("Café market résumé for Zürich.\n\n" * 100).encode("latin-1"))
+    
+    monkeypatch.setattr(settings, "streaming_ingest", True)
+    monkeypatch.setattr(settings, "document_path", str(doc_path))
+    monkeypatch.setattr(settings, "vector_store_path", str(tmp_path / "chroma"))
+    monkeypatch.setattr(
+        embedder_module.genai, "embed_content",
+        lambda model, content, task_type: {'embedding': [[1.0, 0.0, 0.0] for _ in content]}
+    )
+    
+    providers = [
+        getattr(dependencies, name) for name in dir(dependencies)
+        if name.startswith("get_") and hasattr(getattr(dependencies, name), "cache_clear")
+    ]
+    for provider in providers:
+        provider.cache_clear()
+    
+    try:
+        routes.initialize_components()
+        
+        stored = dependencies.get_vector_store().collection.get()['documents']
+        assert stored and all("Café market résumé" in text for text in stored)
+        assert dependencies.get_document_text() == DocumentLoader.load_text_file(str(doc_path))
+    finally:
+        for provider in providers:
+            provider.cache_clear()
+
+
 def test_document_chunking():
     """Test document chunking functionality."""
     from src.data import DocumentLoader, DocumentChunker
@@ -89,5 +160,400 @@ def test_document_chunking():
         assert len(set(first_end.split()) & set(second_start.split())) > 0
 
 
+def test_iter_chunks():
+    """Test that streaming chunking covers the text the same way for any piece size."""
+    from src.data import DocumentLoader, DocumentChunker
+    
+    doc_path = Path(__file__).parent.parent / "data" / "innovate_inc_report.txt"
+    content = DocumentLoader().load_document(str(doc_path)) * 5
+    
+    chunker = DocumentChunker(chunk_size=500, chunk_overlap=100)
+    chunks = list(chunker.iter_chunks(content))
+    pieces = [content[i:i + 333] for i in range(0, len(content), 333)]
+    
+    assert len(chunks) > 1
+    assert list(chunker.iter_chunks(pieces)) == chunks
+    
+    for chunk in chunks:
+        assert chunk['length'] <= 500
+        assert content[chunk['start_char']:chunk['end_char']] == chunk['text']
+    
+    # Consecutive chunks overlap, so no text falls between them
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current['start_char'] <= previous['end_char']
+
+
+def test_llm_response_cache():
+    """Test LRU eviction and HIT/MISS counters of the LLM response cache."""
+    from src.agents._llm_cache import LLMResponseCache
+    
+    cache = LLMResponseCache(maxsize=2)
+    key_a = cache.make_key("model", 0.1, 512, "prompt a")
+    key_b = cache.make_key("model", 0.1, 512, "prompt b")
+    key_c = cache.make_key("model", 0.1, 512, "prompt c")
+    
+    assert key_a != cache.make_key("model", 0.2, 512, "prompt a")
+    assert cache.get(key_a) is None
+    
+    cache.set(key_a, "answer a")
+    cache.set(key_b, "answer b")
+    assert cache.get(key_a) == "answer a"
+    
+    # key_b is now least recently used and should be evicted
+    cache.set(key_c, "answer c")
+    assert cache.get(key_b) is None
+    assert cache.get(key_c) == "answer c"
+    
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['size'] == 2
+
+
+def test_llm_response_cache_async_redis():
+    """Test that the async cache path does its Redis I/O off the event loop thread."""
+    import asyncio
+    import threading
+    from src.agents._llm_cache import LLMResponseCache
+    
+    class FakeRedis:
+        def __init__(self):
+            self.data = {}
+            self.threads = []
+        
+        def get(self, key):
+            self.threads.append(threading.get_ident())
+            return self.data.get(key)
+        
+        def setex(self, key, ttl, value):
+            self.threads.append(threading.get_ident())
+            self.data[key] = value
+    
+    cache = LLMResponseCache(maxsize=4)
+    cache._redis = FakeRedis()
+    key = cache.make_key("model", 0.1, 512, "prompt")
+    
+    async def run():
+        loop_thread = threading.get_ident()
+        assert await cache.aget(key) is None
+        await cache.aset(key, "answer")
+        cache.clear()  # drop L1 so the next lookup goes to Redis
+        assert await cache.aget(key) == "answer"
+        return loop_thread
+    
+    loop_thread = asyncio.run(run())
+    
+    assert len(cache._redis.threads) == 3
+    assert loop_thread not in cache._redis.threads
+    assert cache.stats()['redis_hits'] == 1
+
+
+def test_summaries_share_llm_cache():
+    """Test that summarize and summarize_stream reuse each other's cached text."""
+    from types import SimpleNamespace
+    from src.agents import SummarizerAgent
+    from src.agents._llm_cache import configure_llm_cache
+    
+    class CountingModel:
+        def __init__(self):
+            self.calls = 0
+        
+        def generate_content(self, prompt, generation_config, stream=False):
+            self.calls += 1
+            if stream:
+                return [SimpleNamespace(text="Short "), SimpleNamespace(text="summary.")]
+            return SimpleNamespace(text="Short summary.")
+    
+    configure_llm_cache(maxsize=8)
+    agent = SummarizerAgent(api_key="test-key")
+    agent.model = CountingModel()
+    
+    result = agent.summarize("Report text", summary_type="executive", max_words=50)
+    events = list(agent.summarize_stream("Report text", summary_type="executive", max_words=50))
+    
+    assert agent.model.calls == 1
+    assert events[-1]['summary'] == result['summary'] == "Short summary."
+
+
+def test_semantic_cache():
+    """Test that near-duplicate embeddings hit and dissimilar ones miss."""
+    from src.retrieval import SemanticCache
+    
+    cache = SemanticCache(threshold=0.95, max_entries=2)
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    
+    cache.add([1.0, 0.0, 0.0], {'answer': 'a'})
+    cache.add([0.0, 1.0, 0.0], {'answer': 'b'})
+    
+    assert cache.lookup([0.99, 0.05, 0.0]) == {'answer': 'a'}
+    assert cache.lookup([0.7, 0.7, 0.0]) is None
+    
+    # Oldest entry is evicted beyond max_entries
+    cache.add([0.0, 0.0, 1.0], {'answer': 'c'})
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+
+
+def test_semantic_cache_scopes():
+    """Test that answers built from different retrieval top_k are not shared."""
+    from src.retrieval import SemanticCache
+    
+    cache = SemanticCache(threshold=0.95)
+    cache.add([1.0, 0.0], {'answer': 'from 2 chunks'}, scope=2)
+    
+    assert cache.lookup([1.0, 0.0], scope=10) is None
+    assert cache.lookup([1.0, 0.0], scope=2) == {'answer': 'from 2 chunks'}
+    
+    # A less similar entry in the right scope beats a closer one outside it
+    cache.add([0.99, 0.1], {'answer': 'from 10 chunks'}, scope=10)
+    assert cache.lookup([1.0, 0.0], scope=10) == {'answer': 'from 10 chunks'}
+
+
+def test_parse_truncated_json():
+    """Test that fenced and truncated extraction responses still parse."""
+    from src.agents.extractor import ExtractorAgent
+    
+    parse = ExtractorAgent._parse_json_response
+    
+    assert parse(None, '```json\n{"market_share": "12%"}\n```') == {"market_share": "12%"}
+    assert parse(None, '{"company_name": "Innovate Inc.", "competitors": [{"name": "Synergy"') == {
+        "company_name": "Innovate Inc.",
+        "competitors": [{"name": "Synergy"}]
+    }
+
+    # Cut mid-key or right after a colon: keep the fields that completed
+    assert parse(None, '{"company_name": "Innovate Inc.", "market_sh') == {
+        "company_name": "Innovate Inc."
+    }
+    assert parse(None, '{"company_name": "Innovate Inc.", "swot": {"strengths": ["AI"], "weaknesses":') == {
+        "company_name": "Innovate Inc.",
+        "swot": {"strengths": ["AI"]}
+    }
+
+
+def test_heuristic_routing():
+    """Test that only unambiguous queries are routed without the LLM."""
+    from src.agents import RouterAgent
+    
+    route = RouterAgent._heuristic_route
+    
+    assert route("What is the projected CAGR?")['tool'] == 'qa'
+    assert route("Summarize the report")['tool'] == 'summarize'
+    assert route("Extract the key metrics as JSON")['tool'] == 'extract'
+    
+    # Ambiguous (qa + extract) and unmatched queries fall through
+    assert route("Who are the competitors?") is None
+    assert route("Innovate Inc outlook") is None
+
+
+def test_auto_qa_top_k():
+    """Test that only confident non-heuristic routes reduce the /auto Q&A top_k."""
+    from src.agents import RouterAgent
+    from src.api.routes import _auto_qa_top_k
+    from src.config import settings
+    
+    heuristic = RouterAgent._heuristic_route("What is the market size?")
+    assert heuristic['reasoning'] == 'heuristic'
+    assert heuristic['confidence'] >= settings.confident_qa_threshold
+    assert _auto_qa_top_k(heuristic, 10) == 10
+    
+    llm_decision = {'tool': 'qa', 'confidence': 0.99, 'reasoning': 'asks for one figure'}
+    assert _auto_qa_top_k(llm_decision, 10) == min(10, settings.confident_qa_top_k)
+    
+    unsure = {'tool': 'qa', 'confidence': 0.5, 'reasoning': 'could be a summary'}
+    assert _auto_qa_top_k(unsure, 10) == 10
+
+
+def test_aroute_reuses_query_embedding(monkeypatch):
+    """Test that aroute uses a supplied query embedding instead of embedding again."""
+    import asyncio
+    from src.agents import RouterAgent
+    
+    class CountingEmbedder:
+        def __init__(self):
+            self.calls = []
+        
+        def embed_query(self, query):
+            self.calls.append(query)
+            return [1.0, 0.0]
+        
+        def embed_queries(self, queries):
+            self.calls.append(list(queries))
+            return [[0.0, 1.0] for _ in queries]
+    
+    embedder = CountingEmbedder()
+    router = RouterAgent(api_key="test-key", embedder=embedder)
+    monkeypatch.setattr(
+        router, "_route_with_llm",
+        lambda query: {'tool': 'qa', 'confidence': 0.8, 'reasoning': 'llm'}
+    )
+    
+    async def precomputed():
+        return [1.0, 0.0]
+    
+    async def run():
+        # No keyword or prototype match, so this goes to the (faked) LLM
+        task = asyncio.ensure_future(precomputed())
+        return await router.aroute("tell me about pricing in europe", task)
+    
+    assert asyncio.run(run())['reasoning'] == 'llm'
+    
+    # Only the one-off prototype batch was embedded, never the query itself
+    assert len(embedder.calls) == 1
+    assert isinstance(embedder.calls[0], list)
+
+
+def test_prototype_embedding_failure_backs_off(monkeypatch):
+    """Test that a failed prototype embedding is not retried on every query."""
+    from src.agents import RouterAgent
+    
+    class FailingEmbedder:
+        def __init__(self):
+            self.prototype_calls = 0
+        
+        def embed_query(self, query):
+            return [1.0, 0.0]
+        
+        def embed_queries(self, queries):
+            self.prototype_calls += 1
+            raise RuntimeError("quota exceeded")
+    
+    embedder = FailingEmbedder()
+    router = RouterAgent(api_key="test-key", embedder=embedder)
+    # Decisions with an error are not cached, so every query reaches the prototypes
+    monkeypatch.setattr(
+        router, "_route_with_llm",
+        lambda query: {'tool': 'qa', 'confidence': 0.8, 'reasoning': 'llm', 'error': 'offline'}
+    )
+    
+    for query in ("tell me about pricing", "tell me about europe", "tell me about margins"):
+        assert router.route(query)['reasoning'] == 'llm'
+    assert embedder.prototype_calls == 1
+    
+    # Retried once the backoff window has passed
+    router._proto_failed_at -= RouterAgent.PROTOTYPE_RETRY_SECONDS
+    router.route("tell me about hiring")
+    assert embedder.prototype_calls == 2
+
+
+def test_parse_batch_routing():
+    """Test that batched routing responses keep order and reject bad lengths."""
+    from src.agents import RouterAgent
+    
+    parse = RouterAgent._parse_batch_routing_response
+    text = '```json\n[{"tool": "summarize", "confidence": 0.9}, {"tool": "bogus"}]\n```'
+    
+    decisions = parse(text, 2)
+    assert [d['tool'] for d in decisions] == ['summarize', 'qa']
+    
+    with pytest.raises(ValueError):
+        parse(text, 3)
+
+
+def test_batched_embedder():
+    """Test that concurrent query embeddings are coalesced into batches."""
+    import asyncio
+    from src.retrieval import BatchedEmbedder
+    
+    class CountingEmbedder:
+        def __init__(self):
+            self.calls = []
+        
+        def embed_queries(self, queries):
+            self.calls.append(list(queries))
+            return [[float(len(q))] for q in queries]
+    
+    embedder = CountingEmbedder()
+    batcher = BatchedEmbedder(embedder, max_batch_size=3, max_wait_ms=20)
+    
+    async def run():
+        return await asyncio.gather(*(batcher.submit("q" * n) for n in range(1, 6)))
+    
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [len(call) for call in embedder.calls] == [3, 2]
+
+
+def test_batched_embedder_failures():
+    """Test that a short result or shutdown fails waiting queries instead of hanging."""
+    import asyncio
+    import threading
+    from src.retrieval import BatchedEmbedder
+
+    class ShortEmbedder:
+        def embed_queries(self, queries):
+            return [[1.0]] * (len(queries) - 1)
+
+    async def short_result():
+        batcher = BatchedEmbedder(ShortEmbedder(), max_batch_size=2, max_wait_ms=20)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True),
+            timeout=2
+        )
+        await batcher.aclose()
+        return results
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(short_result()))
+
+    release = threading.Event()
+
+    class BlockingEmbedder:
+        def embed_queries(self, queries):
+            release.wait(2)
+            return [[1.0] for _ in queries]
+
+    async def closed_mid_batch():
+        batcher = BatchedEmbedder(BlockingEmbedder(), max_batch_size=1, max_wait_ms=0)
+        pending = [asyncio.ensure_future(batcher.submit(q)) for q in ("a", "b")]
+        await asyncio.sleep(0.05)
+        await batcher.aclose()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), timeout=2)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(closed_mid_batch()))
+
+
+def test_cosine_similarity_batch():
+    """Test that batched cosine similarity matches the pairwise version."""
+    import numpy as np
+    from src.retrieval import GeminiEmbedder
+    
+    matrix = np.array([[1.0, 0.0], [0.0, 2.0], [3.0, 3.0]], dtype=np.float32)
+    query = [1.0, 1.0]
+    
+    scores = GeminiEmbedder.cosine_similarity_batch(query, matrix)
+    expected = [GeminiEmbedder.cosine_similarity(None, row, query) for row in matrix]
+    
+    assert np.allclose(scores, expected, atol=1e-6)
+
+
+def test_query_embedding_cache(monkeypatch):
+    """Test that repeated queries are served from the embedder's query cache."""
+    from src.retrieval import embedder as embedder_module
+    
+    calls = []
+    
+    def fake_embed_content(model, content, task_type):
+        calls.append(content)
+        if isinstance(content, list):
+            return {'embedding': [[float(len(q)), 0.0] for q in content]}
+        return {'embedding': [float(len(content)), 0.0]}
+    
+    monkeypatch.setattr(embedder_module.genai, "embed_content", fake_embed_content)
+    embedder = embedder_module.GeminiEmbedder(api_key="test-key", query_cache_size=2)
+    
+    first = embedder.embed_query("growth")
+    first.append(99.0)  # callers get copies, not the cached entry
+    assert embedder.embed_query("growth") == [1.0, 0.0]
+    assert len(calls) == 1
+    
+    # Only the uncached query is sent, once, even when repeated in a batch
+    assert embedder.embed_queries(["growth", "risks", "risks"]) == [[1.0, 0.0]] * 3
+    assert calls[-1] == ["risks"]
+    
+    embedder.embed_query("market share")  # evicts "growth" (least recently used)
+    embedder.embed_query("growth")
+    assert len(calls) == 4
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])